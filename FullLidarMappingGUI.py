@@ -1,21 +1,123 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
-import matplotlib.colors as mcolors
-from rplidar import RPLidar
+from matplotlib.collections import LineCollection
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from collections import deque
-import queue
 import json
 import os
-import serial.tools.list_ports
 from datetime import datetime
 import csv
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to the NumPy kernels
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard json module
+    orjson = None
+
+# Capacity of the point ring buffer
+MAX_POINTS = 150000
+
+# Redraw at most this often while scanning, and draw at most this many points by default
+DRAW_INTERVAL = 1.0 / 15
+DEFAULT_MAX_DRAW = 30000
+
+# Cos/sin lookup table on a 0.1 degree grid; worst-case rounding error is 0.05 degrees
+# (about 7 mm at 8 m), well under the sensor's own angular resolution
+LUT_STEPS_PER_DEGREE = 10
+_LUT_ANGLES = np.deg2rad(np.arange(360 * LUT_STEPS_PER_DEGREE) / LUT_STEPS_PER_DEGREE)
+_COS = np.cos(_LUT_ANGLES).astype(np.float32)
+_SIN = np.sin(_LUT_ANGLES).astype(np.float32)
+
+# Heatmap grid resolution per axis
+HEATMAP_BINS = 50
+
+# Live statistics fields: (key, label)
+STAT_FIELDS = [
+    ('pts', "Total Points:"),
+    ('dur', "Scan Duration:"),
+    ('scans', "Scans Processed:"),
+    ('rate', "Points/Sec:"),
+    ('kpps', "Data Rate:"),
+    ('mem', "Memory Usage:"),
+]
+
+# Axes title for each display mode
+MODE_TITLES = {
+    "scatter": 'LIDAR Environment Scan',
+    "heatmap": 'LIDAR Heat Map',
+    "lines": 'LIDAR Line Plot',
+}
+
+
+def _convert(qualities, angles_deg, distances, max_d, out):
+    """Filter one scan and write [x, y, quality, distance] rows into out; return the row count"""
+    mask = (distances > 0) & (distances <= max_d) & (qualities > 0)
+    n = int(np.count_nonzero(mask))
+    rows = out[:n]
+    idx = np.rint(angles_deg[mask] * LUT_STEPS_PER_DEGREE).astype(np.intp) % _COS.size
+    rows[:, 3] = distances[mask]
+    np.multiply(_COS[idx], rows[:, 3], out=rows[:, 0])
+    np.multiply(_SIN[idx], rows[:, 3], out=rows[:, 1])
+    rows[:, 2] = qualities[mask]
+    return n
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _convert(qualities, angles_deg, distances, max_d, out):
+        # Fused filter + table lookup in one pass, no temporaries
+        n = 0
+        for i in range(distances.shape[0]):
+            d = distances[i]
+            if d > 0 and d <= max_d and qualities[i] > 0:
+                k = int(angles_deg[i] * LUT_STEPS_PER_DEGREE + 0.5) % _COS.size
+                out[n, 0] = d * _COS[k]
+                out[n, 1] = d * _SIN[k]
+                out[n, 2] = qualities[i]
+                out[n, 3] = d
+                n += 1
+        return n
+
+
+def _hist2d(x, y, xmin, ymin, dx, dy, nx, ny):
+    """Count points into an (nx, ny) grid of dx-by-dy cells starting at (xmin, ymin)"""
+    H, _, _ = np.histogram2d(x, y, bins=(nx, ny),
+                             range=[[xmin, xmin + nx * dx], [ymin, ymin + ny * dy]])
+    return H
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _hist2d(x, y, xmin, ymin, dx, dy, nx, ny):
+        # Integer bin accumulation; the right edge is inclusive like np.histogram2d
+        H = np.zeros((nx, ny), dtype=np.int32)
+        for i in range(x.shape[0]):
+            fx = (x[i] - xmin) / dx
+            fy = (y[i] - ymin) / dy
+            if fx < 0 or fy < 0 or fx > nx or fy > ny:
+                continue
+            ix = min(int(fx), nx - 1)
+            iy = min(int(fy), ny - 1)
+            H[ix, iy] += 1
+        return H
+
+
+def _warm_up_kernels():
+    """Compile the JIT kernels ahead of the first scan"""
+    scan = np.ones((1, 3), dtype=np.float32)
+    points = np.empty((1, 4), dtype=np.float32)
+    _convert(scan[:, 0], scan[:, 1], scan[:, 2], 1.0, points)
+    _hist2d(points[:, 0], points[:, 1], 0.0, 0.0, 1.0, 1.0, HEATMAP_BINS, HEATMAP_BINS)
+
 class ModernLidarMappingGUI:
     def __init__(self, root):
         self.root = root
@@ -52,7 +154,15 @@ class ModernLidarMappingGUI:
         # System variables
         self.lidar = None
         self.is_scanning = False
-        self.all_points = deque(maxlen=150000)
+        # Preallocated ring buffer of [x, y, quality, distance] rows
+        self._buf = np.empty((MAX_POINTS, 4), dtype=np.float32)
+        # Contiguous copy of the x, y columns, used for drawing
+        self._offsets = np.empty((MAX_POINTS, 2), dtype=np.float32)
+        self._head = 0
+        self._size = 0
+        self._written = 0  # Rows ever written; lets background jobs spot new arrivals
+        self._generation = 0  # Bumped whenever the buffer is reset
+        self._consolidate_thread = None
         self.scan_count = 0
         self.start_time = None
         self.connection_status = False
@@ -61,15 +171,29 @@ class ModernLidarMappingGUI:
         self.point_color = "#4fc3f7"
         self.point_size = 2
         self.filter_distance = 8000  # Maximum distance in mm
+        self._filter_dirty = False  # Distance filter changed since the last redraw
+        self._needs_filter = False  # Buffer holds points beyond the current filter
+        self.max_draw_points = DEFAULT_MAX_DRAW
+        self._last_draw = 0.0
+        
+        # Frames are prepared on a single background worker while scanning
+        self._frame_executor = ThreadPoolExecutor(max_workers=1)
+        self._frame_future = None
+        self._frame_stale = False
+        
+        # Scan batches from the worker thread: it only appends, process_queue only pops,
+        # and both deque operations are atomic, so no extra locking is needed
+        self.data_queue = deque()
         
-        # Data queue for thread-safe communication
-        self.data_queue = queue.Queue()
+        # Compile the scan kernels in the background so the first scan doesn't stall
+        if njit is not None:
+            threading.Thread(target=_warm_up_kernels, daemon=True).start()
         
         # Create GUI
         self.setup_gui()
         
-        # Auto-detect ports
-        self.auto_detect_ports()
+        # Auto-detect ports once the window has painted
+        self.root.after_idle(self.auto_detect_ports)
         
         # Start background tasks
         self.update_clock()
@@ -292,6 +416,25 @@ class ModernLidarMappingGUI:
                                       foreground=self.colors['text_secondary'])
         self.distance_label.pack(anchor=tk.E)
         
+        # Display point budget
+        draw_frame = ttk.Frame(viz_frame, style='Custom.TFrame')
+        draw_frame.pack(fill=tk.X, pady=3)
+        
+        ttk.Label(draw_frame, text="Max Drawn Points:", 
+                 background=self.colors['card_bg'],
+                 foreground=self.colors['text_secondary']).pack(anchor=tk.W)
+        
+        self.max_draw_var = tk.IntVar(value=DEFAULT_MAX_DRAW)
+        max_draw_scale = ttk.Scale(draw_frame, from_=5000, to=MAX_POINTS, 
+                                 variable=self.max_draw_var, orient=tk.HORIZONTAL,
+                                 command=self.update_max_draw)
+        max_draw_scale.pack(fill=tk.X, pady=(3, 0))
+        
+        self.max_draw_label = ttk.Label(draw_frame, text=f"{DEFAULT_MAX_DRAW:,} points",
+                                      background=self.colors['card_bg'],
+                                      foreground=self.colors['text_secondary'])
+        self.max_draw_label.pack(anchor=tk.E)
+        
         # Data management
         data_frame = ttk.Frame(control_frame, style='Custom.TFrame')
         data_frame.pack(fill=tk.X, padx=12, pady=12)  
@@ -316,16 +459,48 @@ class ModernLidarMappingGUI:
                                   style='Secondary.TButton', width=18)  
         self.load_btn.pack(fill=tk.X, pady=3)  
         
+        # Point consolidation
+        consolidate_frame = ttk.Frame(data_frame, style='Custom.TFrame')
+        consolidate_frame.pack(fill=tk.X, pady=3)
+        
+        self.consolidate_btn = ttk.Button(consolidate_frame, text="Consolidate", 
+                                         command=self.consolidate_points, state='disabled',
+                                         style='Secondary.TButton', width=11)
+        self.consolidate_btn.pack(side=tk.LEFT)
+        
+        ttk.Label(consolidate_frame, text="r (mm):", 
+                 background=self.colors['card_bg'],
+                 foreground=self.colors['text_secondary']).pack(side=tk.LEFT, padx=(6, 0))
+        
+        self.consolidate_radius_var = tk.IntVar(value=20)
+        ttk.Spinbox(consolidate_frame, from_=1, to=500, width=4,
+                   textvariable=self.consolidate_radius_var).pack(side=tk.LEFT, padx=(3, 0))
+        
         # Statistics
         stats_frame = ttk.LabelFrame(control_frame, text="Real-time Statistics", style='Card.TLabelframe')
         stats_frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)  
         
-        self.stats_text = tk.Text(stats_frame, height=10, width=25, font=('Arial', 9), 
-                                 bg=self.colors['card_bg'], fg=self.colors['text'],
-                                 relief='flat', padx=8, pady=8, wrap=tk.WORD)  
-        self.stats_text.pack(fill=tk.BOTH, expand=True, padx=3, pady=3) 
-        self.stats_text.insert('1.0', "System Ready\n\nConnect to RPLidar to start mapping...")
-        self.stats_text.config(state='disabled')
+        # Status message plus one label per live field, each updated in place
+        self.stat_vars = {key: tk.StringVar(value="-") for key, _ in STAT_FIELDS}
+        self.stat_vars['message'] = tk.StringVar(
+            value="System Ready\n\nConnect to RPLidar to start mapping...")
+        self._stat_values = {}
+        
+        tk.Label(stats_frame, textvariable=self.stat_vars['message'], font=('Arial', 9),
+                 bg=self.colors['card_bg'], fg=self.colors['text'],
+                 justify=tk.LEFT, anchor=tk.W, wraplength=220).pack(fill=tk.X, padx=8, pady=(8, 6))
+        
+        fields_frame = tk.Frame(stats_frame, bg=self.colors['card_bg'])
+        fields_frame.pack(fill=tk.X, padx=8, pady=(0, 8))
+        fields_frame.columnconfigure(1, weight=1)
+        
+        for row, (key, label) in enumerate(STAT_FIELDS):
+            tk.Label(fields_frame, text=label, font=('Arial', 9),
+                     bg=self.colors['card_bg'], fg=self.colors['text_secondary']).grid(
+                         row=row, column=0, sticky=tk.W)
+            tk.Label(fields_frame, textvariable=self.stat_vars[key], font=('Arial', 9, 'bold'),
+                     bg=self.colors['card_bg'], fg=self.colors['text']).grid(
+                         row=row, column=1, sticky=tk.E)
         
     def setup_visualization_panel(self, parent):
         viz_frame = ttk.LabelFrame(parent, text="Real-time Environment Map", style='Card.TLabelframe')
@@ -377,14 +552,33 @@ class ModernLidarMappingGUI:
         for spine in self.ax.spines.values():
             spine.set_color(self.colors['text_secondary'])
         
-        # Initialize scatter plot
-        self.scatter = self.ax.scatter([], [], s=self.point_size, alpha=0.7, color=self.point_color)
+        # Initialize scatter plot (animated: redrawn by blitting over a cached background)
+        self.scatter = self.ax.scatter([], [], s=self.point_size, alpha=0.7, color=self.point_color,
+                                       animated=True)
+        # Point clouds go out as a bitmap in vector exports; axes and grid stay vector
+        self.scatter.set_rasterized(True)
+        self._last_color = self.point_color
+        self._last_size = self.point_size
+        self._background = None
+        
+        # Persistent artists for the other display modes, shown only when selected
+        self._heatmap = self.ax.imshow(np.zeros((HEATMAP_BINS, HEATMAP_BINS)),
+                                       extent=(-5000, 5000, -5000, 5000),
+                                       origin='lower', cmap='hot', interpolation='nearest',
+                                       visible=False)
+        self._lc = LineCollection([], colors=self.point_color, alpha=0.1, linewidths=0.5,
+                                  visible=False)
+        self._lc.set_rasterized(True)
+        self._lc_color = self.point_color
+        self.ax.add_collection(self._lc, autolim=False)
+        
         self.ax.set_xlim(-5000, 5000)
         self.ax.set_ylim(-5000, 5000)
         self.ax.set_aspect('equal')
         
         # Create canvas
         self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self.canvas.draw()
         
         # Create navigation toolbar
@@ -398,6 +592,13 @@ class ModernLidarMappingGUI:
         # Style the toolbar
         self.style_toolbar()
 
+    def _on_draw(self, event):
+        """Cache the static background after every full redraw and paint the scatter on it"""
+        if event.canvas is not self.canvas or self.canvas.is_saving():
+            return  # savefig draws on its own renderer; the animated scatter is included there
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.scatter)
+        
     def zoom_in(self):
         current_geometry = self.root.geometry()
         parts = current_geometry.split('+')
@@ -436,6 +637,8 @@ class ModernLidarMappingGUI:
             print(f"Toolbar styling error: {e}")
         
     def auto_detect_ports(self):
+        # Heavy device modules are imported on first use to keep startup fast
+        import serial.tools.list_ports
         ports = [port.device for port in serial.tools.list_ports.comports()]
         self.port_combo['values'] = ports
         if ports:
@@ -454,6 +657,7 @@ class ModernLidarMappingGUI:
                 messagebox.showerror("Error", "Please select a COM port")
                 return
                 
+            from rplidar import RPLidar
             self.lidar = RPLidar(port)
             
             # Test connection
@@ -466,6 +670,7 @@ class ModernLidarMappingGUI:
             self.scan_btn.config(state='normal')
             self.clear_btn.config(state='normal')
             self.save_btn.config(state='normal')
+            self.consolidate_btn.config(state='normal')
             self.port_combo.config(state='disabled')
             self.refresh_btn.config(state='disabled')
             
@@ -513,9 +718,10 @@ class ModernLidarMappingGUI:
         self.stop_btn.config(state='normal')
         self.start_time = time.time()
         self.scan_count = 0
+        self.update_stats("Scanning in Progress...")
         
         # Clear previous data if any
-        self.all_points.clear()
+        self._reset_points()
         
         # Start scanning thread
         self.scan_thread = threading.Thread(target=self.scan_worker, daemon=True)
@@ -544,148 +750,274 @@ class ModernLidarMappingGUI:
         self.update_visualization()
         
     def scan_worker(self):
+        max_buf_meas = 500
+        # Scratch rows reused across scans; only the valid slice is copied out
+        scratch = np.empty((max_buf_meas, 4), dtype=np.float32)
         try:
-            for scan in self.lidar.iter_scans(scan_type='normal', max_buf_meas=500):
+            for scan in self.lidar.iter_scans(scan_type='normal', max_buf_meas=max_buf_meas):
                 if not self.is_scanning:
                     break
                     
-                points = []
-                for quality, angle, distance in scan:
-                    if 0 < distance <= self.filter_distance and quality > 0:
-                        # Convert to Cartesian coordinates
-                        angle_rad = np.radians(angle)
-                        x = distance * np.cos(angle_rad)
-                        y = distance * np.sin(angle_rad)
-                        points.append([x, y, quality, distance])
+                # Unpack the whole scan at once: columns are quality, angle, distance
+                arr = np.asarray(scan, dtype=np.float32).reshape(-1, 3)
+                
+                # Filter and convert to Cartesian rows of [x, y, quality, distance]
+                if len(arr) > len(scratch):
+                    scratch = np.empty((len(arr), 4), dtype=np.float32)
+                n = _convert(arr[:, 0], arr[:, 1], arr[:, 2], float(self.filter_distance), scratch)
                 
                 # Put the points in the queue
-                if points:
-                    self.data_queue.put(points)
+                if n:
+                    self.data_queue.append(scratch[:n].copy())
                 
         except Exception as e:
             if self.is_scanning:
-                self.data_queue.put(("error", str(e)))
+                self.data_queue.append(("error", str(e)))
                 
     def process_queue(self):
         try:
             while True:
-                data = self.data_queue.get_nowait()
+                data = self.data_queue.popleft()
                 
                 if isinstance(data, tuple) and data[0] == "error":
                     messagebox.showerror("Scan Error", f"Scanning error: {data[1]}")
                     self.stop_scan()
                 else:
-                    self.all_points.extend(data)
+                    self._append_points(data)
                     self.scan_count += 1
+                    # Scans converted before a slider move can exceed the new limit
+                    if data[:, 3].max() > self.filter_distance:
+                        self._needs_filter = True
+                    self._frame_stale = True
                     
-                    # Update visualization periodically for performance
-                    if self.scan_count % 3 == 0:
-                        self.update_visualization()
-                    
-        except queue.Empty:
+        except IndexError:
             pass
         
+        # Apply a frame once the background worker has prepared it
+        if self._frame_future is not None and self._frame_future.done():
+            frame = self._frame_future.result()
+            self._frame_future = None
+            if frame is not None and frame['generation'] == self._generation:
+                self._apply_frame(frame)
+        
+        # Start preparing the next frame at a capped frame rate for performance
+        now = time.monotonic()
+        if (self._frame_stale and self._frame_future is None
+                and now - self._last_draw >= DRAW_INTERVAL):
+            self._last_draw = now
+            self._frame_stale = False
+            job = self._snapshot_frame(self.auto_fit_var.get())
+            if job is not None:
+                self._frame_future = self._frame_executor.submit(self._prepare_frame, job)
+        
         if self.is_scanning:
             self.root.after(50, self.process_queue)
             
-    def update_visualization(self):
-        if not self.all_points:
+    def _append_points(self, points):
+        """Write rows into the ring buffer, overwriting the oldest points when full"""
+        n = len(points)
+        capacity = len(self._buf)
+        if n >= capacity:
+            self._buf[:] = points[-capacity:]
+            self._offsets[:] = points[-capacity:, :2]
+            self._head = 0
+            self._size = capacity
+            self._written += n
             return
-            
-        # Convert to numpy array for efficiency
-        points_array = np.array(self.all_points)
         
-        # Filter by distance
-        points_array = points_array[points_array[:, 3] <= self.filter_distance]
+        end = self._head + n
+        if end <= capacity:
+            self._buf[self._head:end] = points
+            self._offsets[self._head:end] = points[:, :2]
+        else:
+            split = capacity - self._head
+            self._buf[self._head:] = points[:split]
+            self._buf[:n - split] = points[split:]
+            self._offsets[self._head:] = points[:split, :2]
+            self._offsets[:n - split] = points[split:, :2]
+        self._head = end % capacity
+        self._size = min(self._size + n, capacity)
+        self._written += n
+        
+    def _reset_points(self):
+        """Empty the ring buffer and invalidate any background job working on it"""
+        self._head = self._size = 0
+        self._needs_filter = False
+        self._generation += 1
+        
+    def _ordered_points(self):
+        """Copy of the stored points from oldest to newest"""
+        if self._size < len(self._buf):
+            return self._buf[:self._size].copy()
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
         
-        if len(points_array) == 0:
-            return
-            
-        # Clear the axis for different visualization modes
-        if self.visualization_mode != "scatter":
-            self.ax.clear()
-            self.ax.set_facecolor('#1a1a2e')
-            self.ax.grid(True, alpha=0.2, color='#444466')
-            self.ax.set_xlabel('X (mm)', color=self.colors['text'])
-            self.ax.set_ylabel('Y (mm)', color=self.colors['text'])
-            self.ax.set_title('LIDAR Environment Scan', color=self.colors['text'])
-            self.ax.tick_params(colors=self.colors['text_secondary'])
-            for spine in self.ax.spines.values():
-                spine.set_color(self.colors['text_secondary'])
-        
-        # Update visualization based on mode
-        if self.visualization_mode == "scatter":
-            self.scatter.set_offsets(points_array[:, :2])
-            self.scatter.set_color(self.point_color)
-            self.scatter.set_sizes([self.point_size] * len(points_array))
-        elif self.visualization_mode == "heatmap":
-            if len(points_array) > 100:  # Only create heatmap if we have enough points
-                self.ax.hist2d(points_array[:, 0], points_array[:, 1], bins=50, cmap='hot')
-                self.ax.set_title('LIDAR Heat Map', color=self.colors['text'])
-        elif self.visualization_mode == "lines":
-            # Simple line plot from center to points (sample for performance)
-            sample_points = points_array[::20]  # Sample every 20th point
-            for point in sample_points:
-                self.ax.plot([0, point[0]], [0, point[1]], color=self.point_color, 
-                           alpha=0.1, linewidth=0.5)
-            self.ax.scatter(points_array[:, 0], points_array[:, 1], 
-                          s=1, alpha=0.5, color=self.point_color)
-            self.ax.set_title('LIDAR Line Plot', color=self.colors['text'])
+    def update_visualization(self):
+        job = self._snapshot_frame(self.auto_fit_var.get())
+        if job is not None:
+            self._apply_frame(self._prepare_frame(job))
+        
+    def _snapshot_frame(self, auto_fit):
+        """Resolve the filter flags and copy out what one redraw needs (Tk thread only)"""
+        size = self._size
+        if size == 0:
+            return None
+        
+        # Points are filtered at ingest, so only mask again when stored points exceed the limit
+        distances = self._buf[:size, 3]
+        if self._filter_dirty:
+            self._filter_dirty = False
+            self._needs_filter = bool((distances > self.filter_distance).any())
+        
+        # Copies, since ingest keeps overwriting the ring while the frame is prepared
+        return {
+            'generation': self._generation,
+            'mode': self.visualization_mode,
+            'auto_fit': auto_fit,
+            'xy': self._offsets[:size].copy(),
+            'distances': distances.copy() if self._needs_filter else None,
+            'filter_distance': self.filter_distance,
+            'max_draw_points': self.max_draw_points,
+            'size': size,
+            'nbytes': self._buf[:size].nbytes,
+            'scan_count': self.scan_count,
+            'start_time': self.start_time,
+        }
         
-        # Adjust limits dynamically if auto-fit is enabled
-        if self.auto_fit_var.get() and len(points_array) > 10:
-            x_data = points_array[:, 0]
-            y_data = points_array[:, 1]
+    def _prepare_frame(self, job):
+        """Do the NumPy work for one redraw from a snapshot; safe to run off the Tk thread"""
+        mode = job['mode']
+        auto_fit = job['auto_fit']
+        size = job['size']
+        xy = job['xy']
+        if job['distances'] is not None:
+            xy = xy[job['distances'] <= job['filter_distance']]
+        
+        n = len(xy)
+        if n == 0:
+            return None
             
-            x_range = x_data.max() - x_data.min()
-            y_range = y_data.max() - y_data.min()
-            max_range = max(x_range, y_range, 1000)
+        # Column-wise min/max over the (N, 2) block gives all four extrema in two passes;
+        # taken before decimation so skipped outliers are not cropped from the view
+        if mode == "heatmap" or auto_fit:
+            lo = xy.min(axis=0)
+            hi = xy.max(axis=0)
             
-            margin = max_range * 0.1
-            self.ax.set_xlim(x_data.min() - margin, x_data.max() + margin)
-            self.ax.set_ylim(y_data.min() - margin, y_data.max() + margin)
+        # Decimate to the display budget so frame cost stays bounded as the buffer fills
+        if n > job['max_draw_points']:
+            idx = np.linspace(0, n - 1, job['max_draw_points'], dtype=np.int64)
+            xy = xy[idx]
+            n = job['max_draw_points']
+        
+        frame = {'generation': job['generation'], 'mode': mode, 'xy': xy,
+                 'heatmap': None, 'segments': None, 'limits': None, 'stats': None}
+        
+        if mode == "heatmap":
+            if n > 100:  # Only create heatmap if we have enough points
+                x_min = float(lo[0])
+                y_min = float(lo[1])
+                dx = max(float(hi[0]) - x_min, 1.0) / HEATMAP_BINS
+                dy = max(float(hi[1]) - y_min, 1.0) / HEATMAP_BINS
+                H = _hist2d(xy[:, 0], xy[:, 1], x_min, y_min, dx, dy, HEATMAP_BINS, HEATMAP_BINS)
+                frame['heatmap'] = (H, (x_min, x_min + HEATMAP_BINS * dx,
+                                        y_min, y_min + HEATMAP_BINS * dy))
+        elif mode == "lines":
+            # Rays from center to points (sample for performance)
+            sample_points = xy[::20]  # Sample every 20th point
+            segments = np.zeros((len(sample_points), 2, 2), dtype=np.float32)
+            segments[:, 1, :] = sample_points
+            frame['segments'] = segments
         
-        # Update statistics
-        if self.start_time:
-            duration = time.time() - self.start_time
-            stats = (f"Scanning in Progress...\n\n"
-                    f"Total Points: {len(self.all_points):,}\n"
-                    f"Scan Duration: {duration:.1f}s\n"
-                    f"Scans Processed: {self.scan_count}\n"
-                    f"Points/Sec: {len(self.all_points)/duration:.0f}\n"
-                    f"Data Rate: {len(self.all_points)/duration/1000:.1f}K pts/s\n"
-                    f"Memory Usage: {len(self.all_points)*4/1024:.1f} KB")
-            self.update_stats(stats)
+        # Adjust limits dynamically if auto-fit is enabled
+        if auto_fit and n > 10:
+            margin = max(*(hi - lo), 1000) * 0.1
+            frame['limits'] = ((lo[0] - margin, hi[0] + margin),
+                               (lo[1] - margin, hi[1] + margin))
         
-        # Refresh canvas
-        self.canvas.draw_idle()
+        # Update statistics
+        if job['start_time']:
+            duration = time.time() - job['start_time']
+            frame['stats'] = {
+                'pts': f"{size:,}",
+                'dur': f"{duration:.1f}s",
+                'scans': f"{job['scan_count']}",
+                'rate': f"{size/duration:.0f}",
+                'kpps': f"{size/duration/1000:.1f}K pts/s",
+                'mem': f"{job['nbytes']/1024:.1f} KB",
+            }
+        
+        return frame
+        
+    def _apply_frame(self, frame):
+        """Push a prepared frame into the matplotlib artists (Tk thread only)"""
+        if frame is None:
+            return
+            
+        previous_limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        
+        # Update the persistent artists for the current mode
+        if frame['mode'] != "heatmap":
+            self.scatter.set_offsets(frame['xy'])
+            # Color and size are uniform, so only push them when they change
+            point_size = self.point_size if frame['mode'] == "scatter" else 1
+            if self.point_color != self._last_color:
+                self.scatter.set_color(self.point_color)
+                self._last_color = self.point_color
+            if point_size != self._last_size:
+                self.scatter.set_sizes([point_size])
+                self._last_size = point_size
+                
+        if frame['heatmap'] is not None:
+            H, extent = frame['heatmap']
+            self._heatmap.set_data(H.T)
+            self._heatmap.set_extent(extent)
+            self._heatmap.set_clim(0, max(H.max(), 1))
+        if frame['segments'] is not None:
+            self._lc.set_segments(frame['segments'])
+            if self.point_color != self._lc_color:
+                self._lc.set_color(self.point_color)
+                self._lc_color = self.point_color
+        
+        if frame['limits'] is not None:
+            self.ax.set_xlim(*frame['limits'][0])
+            self.ax.set_ylim(*frame['limits'][1])
+        
+        if frame['stats'] is not None:
+            self._set_stat_fields(frame['stats'])
+        
+        # Refresh canvas: blit only the scatter unless the axes themselves changed
+        limits_changed = (self.ax.get_xlim(), self.ax.get_ylim()) != previous_limits
+        if (self.visualization_mode == "scatter" and not limits_changed
+                and self._background is not None):
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self.scatter)
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw_idle()
         
     def update_stats(self, text):
-        self.stats_text.config(state='normal')
-        self.stats_text.delete('1.0', tk.END)
-        self.stats_text.insert('1.0', text)
-        self.stats_text.config(state='disabled')
+        self.stat_vars['message'].set(text)
+        
+    def _set_stat_fields(self, values):
+        """Assign only the statistics fields whose text changed"""
+        for key, value in values.items():
+            if self._stat_values.get(key) != value:
+                self._stat_values[key] = value
+                self.stat_vars[key].set(value)
         
     def clear_data(self):
-        self.all_points.clear()
+        self._reset_points()
         self.scan_count = 0
-        self.ax.clear()
-        self.ax.set_facecolor('#1a1a2e')
-        self.ax.grid(True, alpha=0.2, color='#444466')
-        self.ax.set_xlabel('X (mm)', color=self.colors['text'])
-        self.ax.set_ylabel('Y (mm)', color=self.colors['text'])
-        self.ax.set_title('LIDAR Environment Scan', color=self.colors['text'])
-        self.ax.tick_params(colors=self.colors['text_secondary'])
-        for spine in self.ax.spines.values():
-            spine.set_color(self.colors['text_secondary'])
-        self.scatter = self.ax.scatter([], [], s=self.point_size, alpha=0.7, color=self.point_color)
+        self.scatter.set_offsets(np.empty((0, 2)))
+        self._heatmap.set_data(np.zeros((HEATMAP_BINS, HEATMAP_BINS)))
+        self._lc.set_segments([])
         self.ax.set_xlim(-5000, 5000)
         self.ax.set_ylim(-5000, 5000)
         self.canvas.draw_idle()
+        self._set_stat_fields({key: "-" for key, _ in STAT_FIELDS})
         self.update_stats("Data Cleared\n\nReady for new scan...")
         
     def export_data(self):
-        if not self.all_points:
+        if self._size == 0:
             messagebox.showwarning("Warning", "No data to export")
             return
             
@@ -703,26 +1035,30 @@ class ModernLidarMappingGUI:
         
         if filename:
             try:
-                # Convert deque to list for serialization
-                points_list = list(self.all_points)
+                # Copy the ring buffer out in arrival order for serialization
+                points = self._ordered_points()
                 
                 if filename.endswith('.json'):
                     data_to_save = {
-                        'points': points_list,
+                        'points': points,
                         'scan_count': self.scan_count,
                         'timestamp': datetime.now().isoformat(),
-                        'total_points': len(self.all_points),
+                        'total_points': self._size,
                         'filter_distance': self.filter_distance
                     }
                     
-                    with open(filename, 'w') as f:
-                        json.dump(data_to_save, f, indent=2)
+                    if orjson is not None:
+                        # Serializes the ndarray directly, no intermediate list of lists
+                        with open(filename, 'wb') as f:
+                            f.write(orjson.dumps(data_to_save, option=orjson.OPT_SERIALIZE_NUMPY))
+                    else:
+                        data_to_save['points'] = points.tolist()
+                        with open(filename, 'w') as f:
+                            json.dump(data_to_save, f, indent=2)
                         
                 elif filename.endswith('.csv'):
-                    with open(filename, 'w', newline='') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(['X', 'Y', 'Quality', 'Distance'])
-                        writer.writerows(points_list)
+                    np.savetxt(filename, points, fmt=('%.1f', '%.1f', '%d', '%.1f'), delimiter=',',
+                               header='X,Y,Quality,Distance', comments='')
                     
                 messagebox.showinfo("Success", f"Data exported to {filename}")
                 
@@ -756,28 +1092,114 @@ class ModernLidarMappingGUI:
                         for row in reader:
                             points.append([float(row[0]), float(row[1]), float(row[2]), float(row[3])])
                 
+                points = np.asarray(points, dtype=np.float32)
+                if points.size == 0:
+                    points = points.reshape(0, 4)
+                elif points.ndim != 2 or points.shape[1] != 4:
+                    raise ValueError(f"expected rows of [x, y, quality, distance], "
+                                     f"got an array of shape {points.shape}")
+                
                 # Load points
-                self.all_points.clear()
-                self.all_points.extend(points)
+                self._reset_points()
+                self._append_points(points)
+                self._filter_dirty = True
                 self.scan_count = len(points) // 100  # Estimate
+                self.consolidate_btn.config(state='normal')
                 
                 # Update visualization
                 self.update_visualization()
                 
                 # Update stats
                 stats = (f"Data Loaded\n\n"
-                        f"Total Points: {len(self.all_points):,}\n"
                         f"File: {os.path.basename(filename)}\n"
                         f"Loaded successfully")
                 self.update_stats(stats)
+                self._set_stat_fields({'pts': f"{self._size:,}"})
                 
                 messagebox.showinfo("Success", f"Data loaded from {filename}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load data: {str(e)}")
     
+    def consolidate_points(self):
+        try:
+            from scipy.spatial import cKDTree  # Optional, only needed here
+        except ImportError:
+            messagebox.showerror("Error", "Point consolidation requires SciPy")
+            return
+        if self._size == 0 or (self._consolidate_thread and self._consolidate_thread.is_alive()):
+            return
+        
+        try:
+            radius = float(self.consolidate_radius_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Consolidation radius must be a number")
+            return
+        
+        # Work on a snapshot; points that arrive meanwhile are kept as they are
+        self.consolidate_btn.config(state='disabled')
+        self._consolidate_result = None
+        self._consolidate_thread = threading.Thread(
+            target=self._consolidate_worker,
+            args=(cKDTree, self._ordered_points(), radius, self._written, self._generation),
+            daemon=True)
+        self._consolidate_thread.start()
+        self.root.after(50, self._finish_consolidation)
+    
+    def _consolidate_worker(self, cKDTree, points, radius, written, generation):
+        """Drop points within radius of an earlier kept point (runs off the Tk thread)"""
+        # Coincident returns share a grid cell smaller than the radius; keep the first of each
+        cells = np.floor(points[:, :2] / (radius / np.sqrt(2))).astype(np.int64)
+        _, first = np.unique(cells, axis=0, return_index=True)
+        first.sort()
+        candidates = points[first]
+        
+        # Greedy pass over neighbour pairs sorted by the earlier index
+        tree = cKDTree(candidates[:, :2])
+        pairs = tree.query_pairs(r=radius, output_type='ndarray')
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        keep = np.ones(len(candidates), dtype=bool)
+        for i, j in pairs.tolist():
+            if keep[i]:
+                keep[j] = False
+        
+        # Survivors stay in arrival order so the ring keeps evicting the oldest points first
+        self._consolidate_result = (candidates[keep], written, generation)
+    
+    def _finish_consolidation(self):
+        if self._consolidate_thread.is_alive():
+            self.root.after(50, self._finish_consolidation)
+            return
+        self.consolidate_btn.config(state='normal')
+        
+        if self._consolidate_result is None:
+            return
+        kept, written, generation = self._consolidate_result
+        self._consolidate_result = None
+        if generation != self._generation:
+            return  # Buffer was cleared or reloaded meanwhile
+        
+        # Append whatever arrived while the tree was built after the kept points
+        before = self._size
+        new_rows = min(self._written - written, self._size)
+        recent = self._ordered_points()[self._size - new_rows:]
+        self._reset_points()
+        self._filter_dirty = True
+        self._append_points(np.concatenate((kept, recent)))
+        
+        self.update_visualization()
+        self.update_stats(f"Points Consolidated\n\n"
+                          f"Before: {before:,}\n"
+                          f"After: {self._size:,}")
+    
     def change_visualization_mode(self):
         self.visualization_mode = self.viz_mode_var.get()
+        self.scatter.set_visible(self.visualization_mode != "heatmap")
+        self._heatmap.set_visible(self.visualization_mode == "heatmap")
+        self._lc.set_visible(self.visualization_mode == "lines")
+        self.ax.set_title(MODE_TITLES[self.visualization_mode], color=self.colors['text'],
+                          fontsize=12, pad=15)
+        self.canvas.draw_idle()
         self.update_visualization()
     
     def set_point_color(self, color):
@@ -786,24 +1208,25 @@ class ModernLidarMappingGUI:
     
     def update_distance_filter(self, value):
         self.filter_distance = int(float(value))
+        self._filter_dirty = True
         self.distance_label.config(text=f"{self.filter_distance} mm")
         self.update_visualization()
     
+    def update_max_draw(self, value):
+        self.max_draw_points = int(float(value))
+        self.max_draw_label.config(text=f"{self.max_draw_points:,} points")
+        self.update_visualization()
+    
     def fit_to_data(self):
-        if self.all_points:
-            points_array = np.array(self.all_points)
-            if len(points_array) > 10:
-                x_data = points_array[:, 0]
-                y_data = points_array[:, 1]
-                
-                x_range = x_data.max() - x_data.min()
-                y_range = y_data.max() - y_data.min()
-                max_range = max(x_range, y_range, 1000)
-                
-                margin = max_range * 0.1
-                self.ax.set_xlim(x_data.min() - margin, x_data.max() + margin)
-                self.ax.set_ylim(y_data.min() - margin, y_data.max() + margin)
-                self.canvas.draw_idle()
+        if self._size > 10:
+            xy = self._offsets[:self._size]
+            lo = xy.min(axis=0)
+            hi = xy.max(axis=0)
+            
+            margin = max(*(hi - lo), 1000) * 0.1
+            self.ax.set_xlim(lo[0] - margin, hi[0] + margin)
+            self.ax.set_ylim(lo[1] - margin, hi[1] + margin)
+            self.canvas.draw_idle()
     
     def reset_view(self):
         self.ax.set_xlim(-5000, 5000)
@@ -1,18 +1,73 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from rplidar import RPLidar
 import time
 import threading
-from collections import deque
 import queue
 import json
 import os
 import serial.tools.list_ports
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to the NumPy kernel
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard json module
+    orjson = None
+
+# Capacity of the point ring buffer
+MAX_POINTS = 100000
+
+# Redraw at most this often
+DRAW_INTERVAL = 1.0 / 15
+
+# Above this many points, draw at most one point per screen pixel
+DECIMATE_MIN_POINTS = 10000
+
+# Cos/sin lookup table on a 0.1 degree grid; worst-case rounding error is 0.05 degrees
+# (about 7 mm at 8 m), well under the sensor's own angular resolution
+LUT_STEPS_PER_DEGREE = 10
+_LUT_ANGLES = np.deg2rad(np.arange(360 * LUT_STEPS_PER_DEGREE) / LUT_STEPS_PER_DEGREE)
+_COS = np.cos(_LUT_ANGLES).astype(np.float32)
+_SIN = np.sin(_LUT_ANGLES).astype(np.float32)
+
+
+def _convert(scan, out):
+    """Filter [quality, angle, distance] rows and write [x, y, quality] rows into out; return the row count"""
+    q, a, d = scan[:, 0], scan[:, 1], scan[:, 2]
+    mask = (d > 0) & (q > 0)
+    n = int(np.count_nonzero(mask))
+    idx = np.rint(a[mask] * LUT_STEPS_PER_DEGREE).astype(np.intp) % _COS.size
+    d = d[mask]
+    np.multiply(_COS[idx], d, out=out[:n, 0])
+    np.multiply(_SIN[idx], d, out=out[:n, 1])
+    out[:n, 2] = q[mask]
+    return n
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _convert(scan, out):
+        # Fused filter + table lookup in one pass, no temporaries
+        n = 0
+        for i in range(scan.shape[0]):
+            q = scan[i, 0]
+            d = scan[i, 2]
+            if d > 0 and q > 0:
+                k = int(scan[i, 1] * LUT_STEPS_PER_DEGREE + 0.5) % _COS.size
+                out[n, 0] = d * _COS[k]
+                out[n, 1] = d * _SIN[k]
+                out[n, 2] = q
+                n += 1
+        return n
+
+
 class LidarMappingGUI:
     def __init__(self, root):
         self.root = root
@@ -23,11 +78,25 @@ class LidarMappingGUI:
         # System variables
         self.lidar = None
         self.is_scanning = False
-        self.all_points = deque(maxlen=100000)  # Use deque to limit memory usage
+        # Preallocated ring buffer of [x, y, quality] rows to limit memory usage
+        self._buf = np.empty((MAX_POINTS, 3), dtype=np.float32)
+        self._head = 0
+        self._count = 0
+        # Running [xmin, xmax, ymin, ymax] of the stored points, None when stale
+        self._extents = None
         self.scan_count = 0
         self.start_time = None
         self.connection_status = False
         self.scan_thread = None
+        self._stats_job = None
+        # Set when the plot needs a redraw; picked up by the _maybe_draw loop
+        self._dirty = False
+        
+        # Compile the scan kernel in the background so the first scan doesn't stall
+        if njit is not None:
+            threading.Thread(target=_convert, args=(np.ones((1, 3), dtype=np.float32),
+                                                    np.empty((1, 3), dtype=np.float32)),
+                             daemon=True).start()
         
         # Data queue for thread-safe communication
         self.data_queue = queue.Queue()
@@ -38,6 +107,9 @@ class LidarMappingGUI:
         # Auto-detect ports
         self.auto_detect_ports()
         
+        # Start the rate-limited redraw loop
+        self._maybe_draw()
+        
     def setup_gui(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -97,15 +169,19 @@ class LidarMappingGUI:
                                   command=self.save_data, state='disabled', width=20)
         self.save_btn.grid(row=5, column=0, columnspan=2, pady=5, sticky=(tk.W, tk.E))
         
+        self.load_btn = ttk.Button(control_frame, text="Load Scan Data", 
+                                  command=self.load_data, width=20)
+        self.load_btn.grid(row=6, column=0, columnspan=2, pady=5, sticky=(tk.W, tk.E))
+        
         # Statistics frame
         stats_frame = ttk.LabelFrame(control_frame, text="Statistics", padding="10")
-        stats_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(20, 0))
+        stats_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(20, 0))
         
-        self.stats_text = tk.Text(stats_frame, height=12, width=30, font=('Arial', 9),
-                                 bg='#f8f9fa', relief='flat')
-        self.stats_text.grid(row=0, column=0, sticky=(tk.W, tk.E))
-        self.stats_text.insert('1.0', "Disconnected\n\nConnect to RPLidar to start mapping...")
-        self.stats_text.config(state='disabled')
+        # A Label bound to a StringVar: setting the variable is one cheap Tk call
+        self.stats_var = tk.StringVar(value="Disconnected\n\nConnect to RPLidar to start mapping...")
+        self.stats_label = tk.Label(stats_frame, textvariable=self.stats_var, height=12, width=30,
+                                    font=('Arial', 9), bg='#f8f9fa', justify='left', anchor='nw')
+        self.stats_label.grid(row=0, column=0, sticky=(tk.W, tk.E))
         
         # Visualization area
         viz_frame = ttk.LabelFrame(main_frame, text="Real-time Map", padding="10")
@@ -122,14 +198,18 @@ class LidarMappingGUI:
         self.ax.set_ylabel('Y (mm)')
         self.ax.set_title('Lidar Scan Data', pad=20)
         
-        # Initialize scatter plot
-        self.scatter = self.ax.scatter([], [], s=1, alpha=0.6, color='blue')
+        # Initialize point plot: a marker-only Line2D renders one shared marker path for all
+        # points (animated: redrawn by blitting over a cached background)
+        (self._pts,) = self.ax.plot([], [], linestyle='', marker='.', markersize=1,
+                                    alpha=0.6, color='blue', animated=True)
+        self._background = None
         self.ax.set_xlim(-5000, 5000)
         self.ax.set_ylim(-5000, 5000)
         self.ax.set_aspect('equal')
         
         # Create canvas
         self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self.canvas.draw()
         self.canvas.get_tk_widget().grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
@@ -137,6 +217,13 @@ class LidarMappingGUI:
         control_frame.columnconfigure(1, weight=1)
         stats_frame.columnconfigure(0, weight=1)
         
+    def _on_draw(self, event):
+        """Cache the static background after every full redraw and paint the points on it"""
+        if event.canvas is not self.canvas or self.canvas.is_saving():
+            return  # savefig draws on its own renderer; the animated points are included there
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self._pts)
+        
     def auto_detect_ports(self):
         """Auto-detect available COM ports"""
         ports = [port.device for port in serial.tools.list_ports.comports()]
@@ -219,7 +306,7 @@ class LidarMappingGUI:
         self.scan_count = 0
         
         # Clear previous data if any
-        self.all_points.clear()
+        self._reset_points()
         
         # Start scanning thread
         self.scan_thread = threading.Thread(target=self.scan_worker, daemon=True)
@@ -228,6 +315,9 @@ class LidarMappingGUI:
         # Start processing the queue in the main thread
         self.process_queue()
         
+        # Live statistics are refreshed on their own slower clock
+        self._stats_job = self.root.after(1000, self._refresh_stats)
+        
     def stop_scan(self):
         self.is_scanning = False
         self.scan_btn.config(state='normal')
@@ -245,133 +335,325 @@ class LidarMappingGUI:
             self.scan_thread.join(timeout=2.0)
             
         # Update final statistics
-        self.update_visualization()
+        if self._stats_job is not None:
+            self.root.after_cancel(self._stats_job)
+        self._refresh_stats()
+        self._dirty = True
         
     def scan_worker(self):
         try:
+            # Conversion scratch, reused across scans and grown when a scan is larger
+            out = np.empty((2048, 3), dtype=np.float32)
+            
             for scan in self.lidar.iter_scans(scan_type='normal', max_buf_meas=500):
                 if not self.is_scanning:
                     break
                     
-                points = []
-                for quality, angle, distance in scan:
-                    if distance > 0 and quality > 0:
-                        # Convert to Cartesian coordinates
-                        angle_rad = np.radians(angle)
-                        x = distance * np.cos(angle_rad)
-                        y = distance * np.sin(angle_rad)
-                        points.append([x, y, quality])
+                # Convert the whole scan at once: columns are quality, angle, distance.
+                # float32 matches the ring buffer; millimetre distances need no more
+                arr = np.asarray(scan, dtype=np.float32).reshape(-1, 3)
+                if len(arr) > len(out):
+                    out = np.empty((len(arr), 3), dtype=np.float32)
                 
-                # Put the points in the queue
-                if points:
-                    self.data_queue.put(points)
+                # Cartesian rows of [x, y, quality]
+                n = _convert(arr, out)
+                
+                # Put a copy of the points in the queue; out is reused by the next scan
+                if n:
+                    self.data_queue.put(out[:n].copy())
                 
         except Exception as e:
             if self.is_scanning:  # Only show error if we didn't stop intentionally
                 self.data_queue.put(("error", str(e)))
                 
     def process_queue(self):
+        # Drain everything pending in one pass (non-blocking)
+        items = []
         try:
             while True:
-                # Get data from the queue (non-blocking)
-                data = self.data_queue.get_nowait()
-                
-                if isinstance(data, tuple) and data[0] == "error":
-                    messagebox.showerror("Scan Error", f"Scanning error: {data[1]}")
-                    self.stop_scan()
-                else:
-                    # Add new points
-                    self.all_points.extend(data)
-                    self.scan_count += 1
-                    
-                    # Update visualization periodically
-                    if self.scan_count % 2 == 0:  # Update every 2 scans for performance
-                        self.update_visualization()
-                    
+                items.append(self.data_queue.get_nowait())
         except queue.Empty:
             pass
         
+        batches = [data for data in items if not isinstance(data, tuple)]
+        errors = [data for data in items if isinstance(data, tuple) and data[0] == "error"]
+        
+        # Add new points with one vectorized insert for the whole backlog
+        received = bool(batches)
+        if received:
+            self._append_points(np.concatenate(batches, axis=0))
+            self.scan_count += len(batches)
+        
+        if errors:
+            messagebox.showerror("Scan Error", f"Scanning error: {errors[0][1]}")
+            self.stop_scan()
+        
+        # Redrawn by _maybe_draw at a capped frame rate
+        if received:
+            self._dirty = True
+        
         # Schedule the next update if still scanning
         if self.is_scanning:
             self.root.after(50, self.process_queue)  # Process every 50ms
             
-    def update_visualization(self):
-        if not self.all_points:
+    def _append_points(self, points):
+        """Write rows into the ring buffer, overwriting the oldest points when full"""
+        n = len(points)
+        if n == 0:
             return
+        if n > MAX_POINTS:
+            points = points[-MAX_POINTS:]
+            n = MAX_POINTS
+            
+        # Rows about to be overwritten only invalidate the cached extents if one
+        # of them sits on a bound, which is rare once the buffer has filled
+        ext = self._extents
+        evicted = max(0, self._count + n - MAX_POINTS)
+        if ext is not None and 0 < evicted < self._count:
+            start = (self._head + n - evicted) % MAX_POINTS
+            first = min(evicted, MAX_POINTS - start)
+            for old in (self._buf[start:start + first], self._buf[:evicted - first]):
+                if len(old) and (old[:, 0].min() <= ext[0] or old[:, 0].max() >= ext[1] or
+                                 old[:, 1].min() <= ext[2] or old[:, 1].max() >= ext[3]):
+                    ext = None
+                    break
             
-        # Convert to numpy array for efficiency
-        points_array = np.array(self.all_points)
+        # At most two contiguous copies: up to the end of the buffer, then from the start
+        first = min(n, MAX_POINTS - self._head)
+        np.copyto(self._buf[self._head:self._head + first], points[:first])
+        np.copyto(self._buf[:n - first], points[first:])
+        
+        x = points[:, 0]
+        y = points[:, 1]
+        batch = [x.min(), x.max(), y.min(), y.max()]
+        if self._count == 0 or evicted >= self._count:
+            # Every old point was replaced
+            self._extents = batch
+        elif ext is not None:
+            self._extents = [min(ext[0], batch[0]), max(ext[1], batch[1]),
+                             min(ext[2], batch[2]), max(ext[3], batch[3])]
+        else:
+            self._extents = None
+        
+        self._head = (self._head + n) % MAX_POINTS
+        self._count = min(MAX_POINTS, self._count + n)
+        
+    def _reset_points(self):
+        self._head = self._count = 0
+        self._extents = None
+        
+    def _get_extents(self):
+        """Return (xmin, xmax, ymin, ymax), scanning the buffer only after a bound was evicted"""
+        if self._extents is None:
+            points = self._buf[:self._count]
+            x = points[:, 0]
+            y = points[:, 1]
+            self._extents = [x.min(), x.max(), y.min(), y.max()]
+        return self._extents
+        
+    def _ordered_points(self):
+        """Copy of the stored points from oldest to newest"""
+        if self._count < MAX_POINTS:
+            return self._buf[:self._count].copy()
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
+        
+    def _maybe_draw(self):
+        """Redraw at most once per DRAW_INTERVAL, and only when something changed"""
+        if self._dirty:
+            self._dirty = False
+            self.update_visualization()
+        self.root.after(int(DRAW_INTERVAL * 1000), self._maybe_draw)
         
-        # Update scatter plot data
-        self.scatter.set_offsets(points_array[:, :2])
+    def update_visualization(self):
+        if self._count == 0:
+            self._pts.set_data([], [])
+            self.canvas.draw_idle()
+            return
+            
+        # View of the filled part of the buffer, no conversion needed
+        points_array = self._buf[:self._count]
         
         # Adjust limits dynamically
+        previous_limits = (self.ax.get_xlim(), self.ax.get_ylim())
         if len(points_array) > 10:
-            x_data = points_array[:, 0]
-            y_data = points_array[:, 1]
+            x_min, x_max, y_min, y_max = self._get_extents()
             
-            x_range = x_data.max() - x_data.min()
-            y_range = y_data.max() - y_data.min()
+            x_range = x_max - x_min
+            y_range = y_max - y_min
             max_range = max(x_range, y_range, 1000)  # Minimum range of 1000mm
             
             margin = max_range * 0.1
-            self.ax.set_xlim(x_data.min() - margin, x_data.max() + margin)
-            self.ax.set_ylim(y_data.min() - margin, y_data.max() + margin)
-        
-        # Update statistics
+            self.ax.set_xlim(x_min - margin, x_max + margin)
+            self.ax.set_ylim(y_min - margin, y_max + margin)
+        
+        # Update point plot data
+        shown = self._decimate(points_array)
+        self._pts.set_data(shown[:, 0], shown[:, 1])
+        
+        # Refresh canvas: blit only the points unless the axes themselves changed
+        limits_changed = (self.ax.get_xlim(), self.ax.get_ylim()) != previous_limits
+        if not limits_changed and self._background is not None:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self._pts)
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw_idle()
+        
+    def _decimate(self, points):
+        """Keep one point per screen pixel of the current view"""
+        if len(points) <= DECIMATE_MIN_POINTS:
+            return points
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        ncols = max(int(self.ax.bbox.width), 1)
+        nrows = max(int(self.ax.bbox.height), 1)
+        
+        cols = np.floor((points[:, 0] - x0) * (ncols / (x1 - x0))).astype(np.int64)
+        rows = np.floor((points[:, 1] - y0) * (nrows / (y1 - y0))).astype(np.int64)
+        _, keep = np.unique(rows * ncols + cols, return_index=True)
+        return points[keep]
+        
+    def _refresh_stats(self):
+        """Show scan statistics; repeats once per second while scanning"""
+        self._stats_job = None
         if self.start_time:
-            duration = time.time() - self.start_time
+            duration = max(time.time() - self.start_time, 1e-3)
             stats = (f"Scanning...\n\n"
-                    f"Total Points: {len(self.all_points)}\n"
+                    f"Total Points: {self._count}\n"
                     f"Scan Duration: {duration:.1f}s\n"
                     f"Scans Processed: {self.scan_count}\n"
-                    f"Points/Sec: {len(self.all_points)/duration:.0f}\n"
-                    f"Data Rate: {len(self.all_points)/duration/1000:.1f}K pts/s")
+                    f"Points/Sec: {self._count/duration:.0f}\n"
+                    f"Data Rate: {self._count/duration/1000:.1f}K pts/s")
             self.update_stats(stats)
-        
-        # Refresh canvas
-        self.canvas.draw_idle()
+            
+        if self.is_scanning:
+            self._stats_job = self.root.after(1000, self._refresh_stats)
         
     def update_stats(self, text):
-        self.stats_text.config(state='normal')
-        self.stats_text.delete('1.0', tk.END)
-        self.stats_text.insert('1.0', text)
-        self.stats_text.config(state='disabled')
+        self.stats_var.set(text)
         
     def clear_data(self):
-        self.all_points.clear()
+        self._reset_points()
         self.scan_count = 0
-        self.update_visualization()
+        self._dirty = True
         self.update_stats("Data Cleared\n\nReady for new scan...")
         
     def save_data(self):
-        if not self.all_points:
+        if self._count == 0:
             messagebox.showwarning("Warning", "No data to save")
             return
             
         filename = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            defaultextension=".npy",
+            filetypes=[("NumPy files", "*.npy"), ("NumPy archives", "*.npz"),
+                       ("Parquet files", "*.parquet"), ("JSON files", "*.json"),
+                       ("CSV files", "*.csv"), ("All files", "*.*")],
             title="Save Scan Data"
         )
         
         if filename:
             try:
-                # Convert deque to list for JSON serialization
-                data_to_save = {
-                    'points': list(self.all_points),
-                    'scan_count': self.scan_count,
-                    'timestamp': time.time(),
-                    'total_points': len(self.all_points)
-                }
+                # Copy the ring buffer out in arrival order
+                points = self._ordered_points()
                 
-                with open(filename, 'w') as f:
-                    json.dump(data_to_save, f, indent=2)
+                if filename.endswith('.npy'):
+                    # Raw float32 rows, no text formatting
+                    np.save(filename, points)
+                elif filename.endswith('.npz'):
+                    # Binary points plus the scan count in one file
+                    np.savez(filename, points=points, scan_count=self.scan_count)
+                elif filename.endswith('.parquet'):
+                    # Typed, compressed columns; pyarrow is only needed for this format
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.table({'x': points[:, 0], 'y': points[:, 1], 'q': points[:, 2]})
+                    pq.write_table(table, filename, compression='zstd')
+                elif filename.endswith('.csv'):
+                    # Formatted in C by savetxt; a large buffer cuts write() calls
+                    with open(filename, 'w', newline='', buffering=1 << 20) as f:
+                        np.savetxt(f, points, delimiter=',', fmt=['%.3f', '%.3f', '%d'],
+                                   header='X,Y,Quality', comments='')
+                else:
+                    data_to_save = {
+                        'points': points,
+                        'scan_count': self.scan_count,
+                        'timestamp': time.time(),
+                        'total_points': self._count
+                    }
+                    
+                    if orjson is not None:
+                        # Serializes the ndarray directly, no intermediate list of lists
+                        payload = orjson.dumps(data_to_save, option=orjson.OPT_SERIALIZE_NUMPY)
+                    else:
+                        data_to_save['points'] = points.tolist()
+                        payload = json.dumps(data_to_save, indent=2).encode()
+                        
+                    # Serialized up front: a payload larger than the file buffer goes
+                    # straight to the OS in one write() instead of 8 KiB chunks
+                    with open(filename, 'wb') as f:
+                        f.write(payload)
                     
                 messagebox.showinfo("Success", f"Data saved to {filename}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save data: {str(e)}")
+                
+    def load_data(self):
+        filename = filedialog.askopenfilename(
+            filetypes=[("NumPy files", "*.npy"), ("NumPy archives", "*.npz"),
+                       ("Parquet files", "*.parquet"), ("JSON files", "*.json"),
+                       ("All files", "*.*")],
+            title="Load Scan Data"
+        )
+        
+        if filename:
+            try:
+                if filename.endswith('.npy'):
+                    # Memory-mapped: pages are read straight into the ring buffer copy
+                    points = np.load(filename, mmap_mode='r')
+                    scan_count = 0
+                elif filename.endswith('.npz'):
+                    with np.load(filename) as archive:
+                        points = archive['points']
+                        scan_count = int(archive['scan_count'])
+                elif filename.endswith('.parquet'):
+                    import pyarrow.parquet as pq
+                    table = pq.read_table(filename, columns=['x', 'y', 'q'])
+                    points = np.column_stack([column.to_numpy() for column in table.columns])
+                    scan_count = 0
+                else:
+                    if orjson is not None:
+                        with open(filename, 'rb') as f:
+                            data = orjson.loads(f.read())
+                    else:
+                        with open(filename, 'r') as f:
+                            data = json.load(f)
+                    points = data['points']
+                    scan_count = data.get('scan_count', 0)
+                    
+                points = np.asarray(points, dtype=np.float32)
+                if points.size == 0:
+                    points = points.reshape(0, 3)
+                elif points.ndim != 2 or points.shape[1] != 3:
+                    raise ValueError(f"expected rows of [x, y, quality], "
+                                     f"got an array of shape {points.shape}")
+                
+                # Keep the newest rows that fit in the buffer
+                points = points[-MAX_POINTS:]
+                self._reset_points()
+                self._append_points(points)
+                self.scan_count = scan_count
+                # Loaded data has no scan rate; keep live stats from replacing the summary
+                self.start_time = None
+                self.save_btn.config(state='normal')
+                
+                self._dirty = True
+                self.update_stats(f"Data Loaded\n\n"
+                                  f"Total Points: {self._count}\n"
+                                  f"File: {os.path.basename(filename)}")
+                
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load data: {str(e)}")
 
 def main():
     root = tk.Tk()
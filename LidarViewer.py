@@ -2,9 +2,60 @@ import pygame
 import sys
 import math
 import time
+import queue
 from rplidar import RPLidar
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to the NumPy kernel
+    njit = None
+
+# Capacity of the point ring buffer
+MAX_POINTS = 2000
+
+# Scan batches the worker may queue ahead of the display loop
+QUEUE_SIZE = 16
+# Past this backlog the worker skips whole scans instead of converting them
+QUEUE_HIGH_WATER = int(QUEUE_SIZE * 0.7)
+
+# Cos/sin lookup table on a 0.1 degree grid; worst-case rounding error is 0.05 degrees
+# (about 7 mm at 8 m), well under the sensor's own angular resolution
+LUT_STEPS_PER_DEGREE = 10
+_LUT_ANGLES = np.deg2rad(np.arange(360 * LUT_STEPS_PER_DEGREE) / LUT_STEPS_PER_DEGREE)
+_COS = np.cos(_LUT_ANGLES).astype(np.float32)
+_SIN = np.sin(_LUT_ANGLES).astype(np.float32)
+
+# One scan measurement as yielded by iter_scans: (quality, angle, distance)
+SCAN_DTYPE = np.dtype([('quality', np.float32), ('angle', np.float32), ('distance', np.float32)])
+
+
+def _project(angle, distance, out):
+    """Write [x, y] rows for the valid measurements into out; return the row count"""
+    mask = distance > 0  # Basic filter
+    n = int(np.count_nonzero(mask))
+    idx = np.rint(angle[mask] * LUT_STEPS_PER_DEGREE).astype(np.intp) % _COS.size
+    d = distance[mask]
+    np.multiply(d, np.take(_COS, idx), out=out[:n, 0])
+    np.multiply(d, np.take(_SIN, idx), out=out[:n, 1])
+    return n
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _project(angle, distance, out):
+        # Fused filter + table lookup in one pass, no temporaries
+        n = 0
+        for i in range(distance.shape[0]):
+            d = distance[i]
+            if d > 0:
+                k = int(angle[i] * LUT_STEPS_PER_DEGREE + 0.5) % _COS.size
+                out[n, 0] = d * _COS[k]
+                out[n, 1] = d * _SIN[k]
+                n += 1
+        return n
+
+
 class FixedLidarViewer:
     def __init__(self, port='COM3', baudrate=115200):
         self.port = port
@@ -28,11 +79,17 @@ class FixedLidarViewer:
         self.text_color = (255, 255, 100)  #Yellow text
         self.ray_color = (80, 80, 120)  # Subtle rays
         
-        # Data storage
-        self.all_points = []  # Store all points
+        # Scan batches from the worker thread; only the display loop touches the ring buffer
+        self.data_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        
+        # Data storage: ring buffer of the latest [x, y] points
+        self._buf = np.empty((MAX_POINTS, 2), dtype=np.float32)
+        self._head = 0
+        self._count = 0
         self.scan_count = 0
         self.start_time = time.time()
         self.font = None
+        self._stat_surfaces = {}  # line index -> (text, rendered surface)
         
     def connect(self):
         """Connect to RPLidar"""
@@ -64,6 +121,13 @@ class FixedLidarViewer:
             self.screen = pygame.display.set_mode((self.screen_size, self.screen_size))
             pygame.display.set_caption("RPLidar Real-Time Viewer - ESC to exit | +/- to zoom")
             self.font = pygame.font.SysFont('Arial', 18, bold=True)
+            
+            # One pre-rendered point, stamped at every point position
+            r = self.point_size
+            self.dot = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+            pygame.draw.circle(self.dot, self.point_color, (r, r), r)
+            
+            self._rebuild_background()
             print("✅ Pygame initialized successfully!")
             return True
         except Exception as e:
@@ -99,64 +163,94 @@ class FixedLidarViewer:
         try:
             print("📡 Starting scan worker...")
             scan_num = 0
+            next_log = 10
+            
+            # Projection output, reused across scans and grown when a scan is larger.
+            # With Numba the first call compiles here, off the display thread
+            xy = np.empty((1024, 2), dtype=np.float32)
             
             for scan in self.lidar.iter_scans():
                 if not self.is_scanning:
                     break
                 
-                new_points = []
-                valid_points = 0
+                # Display is falling behind: don't spend CPU on points it won't draw
+                if self.data_queue.qsize() > QUEUE_HIGH_WATER:
+                    continue
+                
+                # Parse the whole scan at once straight from its tuples
+                arr = np.fromiter(scan, dtype=SCAN_DTYPE, count=len(scan))
+                if len(arr) > len(xy):
+                    xy = np.empty((len(arr), 2), dtype=np.float32)
                 
-                for quality, angle, distance in scan:
-                    if distance > 0:  # Basic filter
-                        # Convert to cartesian coordinates
-                        angle_rad = np.radians(angle)
-                        x = distance * np.cos(angle_rad)
-                        y = distance * np.sin(angle_rad)
-                        new_points.append((x, y))
-                        valid_points += 1
+                # Convert to cartesian coordinates
+                valid_points = _project(arr['angle'], arr['distance'], xy)
                 
-                if new_points:
-                    self.all_points.extend(new_points)
-                    # Keep only last 2000 points for performance
-                    if len(self.all_points) > 2000:
-                        self.all_points = self.all_points[-2000:]
+                if valid_points:
+                    # Hand off a copy (xy is reused); drop the scan if the display is behind
+                    try:
+                        self.data_queue.put_nowait(xy[:valid_points].copy())
+                    except queue.Full:
+                        continue
                     
-                    self.scan_count += 1
                     scan_num += 1
                     
-                    if scan_num % 10 == 0:
+                    # Progress line every 10 scans
+                    if scan_num >= next_log:
+                        next_log += 10
                         print(f"📊 Scan {scan_num}: {valid_points} points")
                         
         except Exception as e:
             print(f"❌ Scan worker error: {e}")
             self.is_scanning = False
     
+    def _append_points(self, xy):
+        """Write rows into the ring buffer, overwriting the oldest points when full"""
+        xy = xy[-MAX_POINTS:]
+        n = len(xy)
+        first = min(n, MAX_POINTS - self._head)
+        self._buf[self._head:self._head + first] = xy[:first]
+        self._buf[:n - first] = xy[first:]
+        self._head = (self._head + n) % MAX_POINTS
+        self._count = min(MAX_POINTS, self._count + n)
+    
+    def _drain_queue(self):
+        """Move all queued scan batches into the ring buffer"""
+        batches = []
+        try:
+            while True:
+                batches.append(self.data_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if batches:
+            self._append_points(np.concatenate(batches))
+            self.scan_count += len(batches)
+    
     def draw_frame(self):
         """Draw one frame with all points"""
-        # Clear screen
-        self.screen.fill(self.bg_color)
-        
-        # Draw distance circles
-        self.draw_distance_circles()
+        self._drain_queue()
         
-        # Draw axes
-        pygame.draw.line(self.screen, self.axis_color, 
-                        (self.center_x, 0), (self.center_x, self.screen_size), 1)
-        pygame.draw.line(self.screen, self.axis_color, 
-                        (0, self.center_y), (self.screen_size, self.center_y), 1)
+        # Clear screen with the pre-drawn background (circles and axes)
+        self.screen.blit(self.bg_surface, (0, 0))
         
         # Draw all points
-        if self.all_points:
-            for x, y in self.all_points:
-                screen_x = int(x * self.scale) + self.center_x
-                screen_y = int(y * self.scale) + self.center_y
-                
-                # Check if point is within screen bounds
-                if 0 <= screen_x < self.screen_size and 0 <= screen_y < self.screen_size:
-                    # Draw point
-                    pygame.draw.circle(self.screen, self.point_color, 
-                                     (screen_x, screen_y), self.point_size)
+        if self._count:
+            pts = self._buf[:self._count]
+            screen_x = (pts[:, 0] * self.scale).astype(np.int32) + self.center_x
+            screen_y = (pts[:, 1] * self.scale).astype(np.int32) + self.center_y
+            
+            # Check if point is within screen bounds
+            visible = ((screen_x >= 0) & (screen_x < self.screen_size) &
+                       (screen_y >= 0) & (screen_y < self.screen_size))
+            
+            # Draw points: one batched blit call instead of a draw.circle per point
+            r = self.point_size
+            seq = [(self.dot, (x - r, y - r))
+                   for x, y in zip(screen_x[visible].tolist(), screen_y[visible].tolist())]
+            if hasattr(self.screen, 'fblits'):  # pygame-ce
+                self.screen.fblits(seq)
+            else:
+                self.screen.blits(seq, doreturn=False)
         
         # Draw robot (center)
         pygame.draw.circle(self.screen, self.robot_color, 
@@ -170,30 +264,76 @@ class FixedLidarViewer:
         # Update display
         pygame.display.flip()
     
-    def draw_distance_circles(self):
+    def _rebuild_background(self):
+        """Pre-draw the static background; only needs redoing when the scale changes"""
+        self.bg_surface = pygame.Surface((self.screen_size, self.screen_size)).convert()
+        self.bg_surface.fill(self.bg_color)
+        
+        # Draw distance circles
+        self.draw_distance_circles(self.bg_surface)
+        
+        # Draw axes
+        pygame.draw.line(self.bg_surface, self.axis_color, 
+                        (self.center_x, 0), (self.center_x, self.screen_size), 1)
+        pygame.draw.line(self.bg_surface, self.axis_color, 
+                        (0, self.center_y), (self.screen_size, self.center_y), 1)
+    
+    def draw_distance_circles(self, surface):
         """Draw distance reference circles"""
         distances = [1000, 2000, 3000, 4000, 5000]  # mm
         for dist in distances:
             radius = int(dist * self.scale)
-            pygame.draw.circle(self.screen, (50, 50, 80), 
+            pygame.draw.circle(surface, (50, 50, 80), 
                              (self.center_x, self.center_y), radius, 1)
     
     def draw_stats(self):
         """Draw statistics on screen"""
         elapsed_time = time.time() - self.start_time
         stats = [
-            f"Points: {len(self.all_points)}",
+            f"Points: {self._count}",
             f"Scans: {self.scan_count}",
-            f"Time: {elapsed_time:.1f}s",
+            f"Time: {elapsed_time:.0f}s",  # Whole seconds, so it re-renders once a second
             f"Scale: {self.scale:.2f}",
             "ESC: Exit",
             "+/-: Zoom",
             "R: Reset view"
         ]
         
+        # Re-render a line only when its text changed, then blit all lines in one call
+        seq = []
         for i, text in enumerate(stats):
-            text_surface = self.font.render(text, True, self.text_color)
-            self.screen.blit(text_surface, (10, 10 + i * 25))
+            cached = self._stat_surfaces.get(i)
+            if cached is None or cached[0] != text:
+                cached = (text, self.font.render(text, True, self.text_color))
+                self._stat_surfaces[i] = cached
+            seq.append((cached[1], (10, 10 + i * 25)))
+        self.screen.blits(seq, doreturn=False)
+    
+    def _zoom(self, factor, report=False):
+        """Scale the view by factor, clamped to 0.1-2.0"""
+        self.scale = min(max(self.scale * factor, 0.1), 2.0)
+        self._rebuild_background()
+        if report:
+            print(f"🔍 Zoom: {self.scale:.2f}")
+    
+    def _reset_view(self):
+        self._head = self._count = 0
+        self.scan_count = 0
+        self.start_time = time.time()
+        print("🔄 View reset")
+    
+    # Event handlers; a handler returning True ends the display loop
+    _KEY_HANDLERS = {
+        pygame.K_ESCAPE: lambda self: True,
+        pygame.K_PLUS: lambda self: self._zoom(1.2, report=True),
+        pygame.K_EQUALS: lambda self: self._zoom(1.2, report=True),
+        pygame.K_MINUS: lambda self: self._zoom(0.8, report=True),
+        pygame.K_r: lambda self: self._reset_view(),
+    }
+    _MOUSE_HANDLERS = {
+        4: lambda self: self._zoom(1.1),  # Mouse wheel up
+        5: lambda self: self._zoom(0.9),  # Mouse wheel down
+    }
     
     def handle_events(self):
         """Handle Pygame events"""
@@ -201,24 +341,13 @@ class FixedLidarViewer:
             if event.type == pygame.QUIT:
                 return True
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return True
-                elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
-                    self.scale = min(self.scale * 1.2, 2.0)
-                    print(f"🔍 Zoom: {self.scale:.2f}")
-                elif event.key == pygame.K_MINUS:
-                    self.scale = max(self.scale * 0.8, 0.1)
-                    print(f"🔍 Zoom: {self.scale:.2f}")
-                elif event.key == pygame.K_r:
-                    self.all_points = []
-                    self.scan_count = 0
-                    self.start_time = time.time()
-                    print("🔄 View reset")
+                handler = self._KEY_HANDLERS.get(event.key)
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 4:  # Mouse wheel up
-                    self.scale = min(self.scale * 1.1, 2.0)
-                elif event.button == 5:  # Mouse wheel down
-                    self.scale = max(self.scale * 0.9, 0.1)
+                handler = self._MOUSE_HANDLERS.get(event.button)
+            else:
+                continue
+            if handler and handler(self):
+                return True
         
         return False
     
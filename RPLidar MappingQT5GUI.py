@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.patches import Circle
+from matplotlib.colors import ListedColormap
 import matplotlib
 matplotlib.use('Qt5Agg')
 
@@ -11,14 +12,36 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout
                              QWidget, QPushButton, QLabel, QComboBox, QTextEdit, 
                              QGroupBox, QCheckBox, QSlider, QDoubleSpinBox, QSpinBox,
                              QMessageBox, QFileDialog, QProgressBar)
-from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal, QMutex
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QMutex
 from PyQt5.QtGui import QFont
 import time
 from rplidar import RPLidar
-import csv
+
+# Cos/sin lookup table on a 0.1 degree grid; worst-case rounding error is 0.05 degrees
+# (about 7 mm at 8 m), well under the sensor's own angular resolution
+LUT_STEPS_PER_DEGREE = 10
+_LUT_ANGLES = np.deg2rad(np.arange(360 * LUT_STEPS_PER_DEGREE) / LUT_STEPS_PER_DEGREE)
+_COS = np.cos(_LUT_ANGLES).astype(np.float32)
+_SIN = np.sin(_LUT_ANGLES).astype(np.float32)
+
+# One scan measurement as yielded by iter_scans: (quality, angle, distance)
+SCAN_DTYPE = np.dtype([('quality', np.float32), ('angle', np.float32), ('distance', np.float32)])
+
+# Per-scan work buffers are sized for this many measurements and grow if needed
+MAX_SCAN = 720
+
+# Live statistics refresh at most this often, driven by incoming scans
+STATS_INTERVAL = 0.25
+
+# Occupancy grid shown by the plot: +/-GRID_RANGE mm in GRID_CELL mm cells
+GRID_RANGE = 6000
+GRID_CELL = 25
+GRID_SIZE = 2 * GRID_RANGE // GRID_CELL
+# The Point Size control grows each hit cell into a (2r+1)-cell square, r = (size - 1) // 2
+DEFAULT_POINT_SIZE = 3
 
 class LidarWorker(QThread):
-    data_ready = pyqtSignal(list)
+    data_ready = pyqtSignal(object)  # (N, 2) float32 ndarray of [x, y] rows
     error_signal = pyqtSignal(str)
     info_signal = pyqtSignal(dict)
     
@@ -28,6 +51,14 @@ class LidarWorker(QThread):
         self.lidar = None
         self.is_scanning = False
         self.mutex = QMutex()
+        self._alloc_scan_buffers(MAX_SCAN)
+        
+    def _alloc_scan_buffers(self, size):
+        """Reusable per-scan work arrays, so converting a scan allocates no temporaries"""
+        self._ang = np.empty(size, dtype=np.float32)
+        self._idx = np.empty(size, dtype=np.intp)
+        self._trig = np.empty(size, dtype=np.float32)
+        self._xy = np.empty((size, 2), dtype=np.float32)
         
     def connect_lidar(self):
         try:
@@ -65,33 +96,50 @@ class LidarWorker(QThread):
         self.is_scanning = True
         consecutive_errors = 0
         max_consecutive_errors = 3
+        scans = None
         
         try:
             while self.is_scanning and consecutive_errors < max_consecutive_errors:
                 try:
-                    # Get one scan at a time
-                    scan = next(self.lidar.iter_scans(max_buf_meas=500))
-                    points = []
-                    for quality, angle, distance in scan:
-                        if distance > 0 and quality > 0:
-                            angle_rad = np.radians(angle)
-                            x = distance * np.cos(angle_rad)
-                            y = distance * np.sin(angle_rad)
-                            points.append((x, y))
+                    # Get one scan at a time; next() blocks on the serial port, so the
+                    # loop runs at the sensor's own rate
+                    if scans is None:
+                        scans = self.lidar.iter_scans(max_buf_meas=500)
+                    scan = next(scans)
+                    
+                    # Parse the whole scan at once straight from its tuples
+                    arr = np.fromiter(scan, dtype=SCAN_DTYPE, count=len(scan))
+                    quality, angle, distance = arr['quality'], arr['angle'], arr['distance']
+                    mask = (distance > 0) & (quality > 0)
+                    
+                    # Table lookup instead of per-scan cos/sin, computed in place
+                    n = len(arr)
+                    if n > len(self._xy):
+                        self._alloc_scan_buffers(n)
+                    ang, idx, trig, xy = self._ang[:n], self._idx[:n], self._trig[:n], self._xy[:n]
+                    np.multiply(angle, LUT_STEPS_PER_DEGREE, out=ang)
+                    np.rint(ang, out=ang)
+                    np.copyto(idx, ang, casting='unsafe')
+                    np.remainder(idx, _COS.size, out=idx)
+                    np.take(_COS, idx, out=trig)
+                    np.multiply(distance, trig, out=xy[:, 0])
+                    np.take(_SIN, idx, out=trig)
+                    np.multiply(distance, trig, out=xy[:, 1])
+                    points = xy[mask]
                     
-                    if points:
+                    if len(points):
                         self.data_ready.emit(points)
                         consecutive_errors = 0
                     else:
                         consecutive_errors += 1
-                        
-                    time.sleep(0.02)  # Small delay to prevent buffer overflow
                     
                 except StopIteration:
                     break
                 except Exception as e:
                     consecutive_errors += 1
                     print(f"Scan error: {e}")
+                    # A generator that raised is finished; start a fresh one on retry
+                    scans = None
                     time.sleep(0.1)
                     
         except Exception as e:
@@ -106,15 +154,12 @@ class RealTimePlot(FigureCanvas):
         self.setParent(parent)
         
         self.ax = self.fig.add_subplot(111)
+        self._background = None
+        self.mpl_connect('draw_event', self._on_draw)
         self.setup_plot()
         
-        self.points = []
-        self.scatter = None
-        self.robot_marker = None
-        self.max_points = 5000
-        
     def setup_plot(self):
-        """إعداد الرسم البياني مع كائن scatter فعلي"""
+        """إعداد الرسم البياني"""
         self.ax.clear()
         self.ax.set_facecolor('#2c3e50')
         self.ax.set_xlim(-6000, 6000)
@@ -131,53 +176,78 @@ class RealTimePlot(FigureCanvas):
                           alpha=0.2, linestyle='--')
             self.ax.add_patch(circle)
             
-        # إنشاء كائن scatter فعلي من البداية
-        self.scatter = self.ax.scatter([], [], s=3, c='#3498db', alpha=0.7)
+        # Occupied cells are drawn as one raster: empty cells transparent, hit cells blue.
+        # grid holds the hits; shown is the same map with each hit grown to the point size
+        self.grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.uint8)
+        self.shown = np.zeros_like(self.grid)
+        self._dilate = (DEFAULT_POINT_SIZE - 1) // 2
+        self.img = self.ax.imshow(self.shown, extent=[-GRID_RANGE, GRID_RANGE, -GRID_RANGE, GRID_RANGE],
+                                  origin='lower', cmap=ListedColormap(['none', '#3498db']),
+                                  vmin=0, vmax=255, interpolation='nearest', alpha=0.7,
+                                  animated=True)
         self.robot_marker = self.ax.scatter([0], [0], s=200, c='#e74c3c', 
-                                          marker='^', edgecolors='white', linewidth=2)
+                                          marker='^', edgecolors='white', linewidth=2,
+                                          animated=True)
         
         self.draw_idle()
         
     def update_plot(self, new_points):
-        """تحديث الرسم مع التأكد من وجود كائن scatter"""
-        if new_points:
-            self.points.extend(new_points)
-            
-            # تحديد عدد النقاط لمنع مشاكل الذاكرة
-            if len(self.points) > self.max_points:
-                self.points = self.points[-self.max_points:]
-            
-        # التأكد من وجود كائن scatter
-        if self.scatter is None:
-            print("Creating new scatter plot...")
-            self.scatter = self.ax.scatter([], [], s=3, c='#3498db', alpha=0.7)
-        
-        if self.points:
-            points_array = np.array(self.points)
-            try:
-                self.scatter.set_offsets(points_array)
-                self.scatter.set_sizes([3] * len(points_array))
-            except Exception as e:
-                print(f"Error updating scatter: {e}")
-                # إعادة إنشاء كائن scatter إذا فشل التحديث
-                self.scatter.remove()
-                self.scatter = self.ax.scatter(points_array[:, 0], points_array[:, 1], 
-                                             s=3, c='#3498db', alpha=0.7)
-        
-        self.draw_idle()
+        """تحديث الرسم"""
+        if len(new_points):
+            # Mark the cells hit by this scan; memory stays fixed at one byte per cell
+            cells = np.floor((new_points + GRID_RANGE) / GRID_CELL).astype(np.int32)
+            inside = ((cells >= 0) & (cells < GRID_SIZE)).all(axis=1)
+            cells = cells[inside]
+            self.grid[cells[:, 1], cells[:, 0]] = 255
+            self._mark(cells[:, 1], cells[:, 0])
+            self.img.set_data(self.shown)
+        
+        # Only the map changes per scan: blit it over the cached axes background
+        if self._background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self._background)
+        self._draw_animated()
+        self.blit(self.ax.bbox)
+        
+    def _on_draw(self, event):
+        """Cache the static background after every full redraw (e.g. resize) and paint the map on it"""
+        if event.canvas is not self or self.is_saving():
+            return  # savefig draws on its own renderer; the animated artists are included there
+        self._background = self.copy_from_bbox(self.ax.bbox)
+        self._draw_animated()
+        
+    def _mark(self, rows, cols):
+        """Paint the given grid cells into the shown map, grown by the dilation radius"""
+        r = self._dilate
+        if r:
+            d = np.arange(-r, r + 1)
+            dr, dc = np.meshgrid(d, d, indexing='ij')
+            rows = np.clip(rows[:, None] + dr.ravel(), 0, GRID_SIZE - 1)
+            cols = np.clip(cols[:, None] + dc.ravel(), 0, GRID_SIZE - 1)
+        self.shown[rows, cols] = 255
+        
+    def _draw_animated(self):
+        self.ax.draw_artist(self.img)
+        self.ax.draw_artist(self.robot_marker)
         
     def clear_points(self):
         """مسح جميع النقاط"""
-        self.points = []
-        if self.scatter:
-            self.scatter.set_offsets([])
+        self.grid[:] = 0
+        self.shown[:] = 0
+        self.img.set_data(self.shown)
         self.draw_idle()
         
     def update_visualization_settings(self, point_size, alpha, show_grid):
         """تحديث إعدادات التصور"""
-        if self.scatter and len(self.points) > 0:
-            self.scatter.set_sizes([point_size] * len(self.points))
-            self.scatter.set_alpha(alpha)
+        dilate = (point_size - 1) // 2
+        if dilate != self._dilate:
+            # Rebuild the shown map from the raw hits at the new size
+            self._dilate = dilate
+            self.shown[:] = 0
+            self._mark(*np.nonzero(self.grid))
+            self.img.set_data(self.shown)
+        self.img.set_alpha(alpha)
         self.ax.grid(show_grid)
         self.draw_idle()
 
@@ -185,13 +255,15 @@ class FixedLidarGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.lidar_worker = None
-        self.all_points = []
+        # All points of the session, [x, y] rows; capacity doubles as it fills
+        self._points = np.empty((65536, 2), dtype=np.float32)
+        self._n = 0
         self.scan_count = 0
         self.start_time = None
         self.connection_state = False
+        self._last_stats = 0.0
         
         self.setup_ui()
-        self.setup_timers()
         
     def setup_ui(self):
         self.setWindowTitle("RPLidar Mapping - Fixed Version")
@@ -284,7 +356,7 @@ class FixedLidarGUI(QMainWindow):
         point_layout.addWidget(QLabel("Point Size:"))
         self.point_size = QSpinBox()
         self.point_size.setRange(1, 10)
-        self.point_size.setValue(3)
+        self.point_size.setValue(DEFAULT_POINT_SIZE)
         self.point_size.valueChanged.connect(self.update_visualization)
         point_layout.addWidget(self.point_size)
         vis_layout.addLayout(point_layout)
@@ -346,11 +418,6 @@ class FixedLidarGUI(QMainWindow):
         
         return panel
         
-    def setup_timers(self):
-        self.stats_timer = QTimer()
-        self.stats_timer.timeout.connect(self.update_statistics)
-        self.stats_timer.start(1000)
-        
     def toggle_connection(self):
         if self.connection_state:
             self.disconnect_lidar()
@@ -402,12 +469,27 @@ class FixedLidarGUI(QMainWindow):
     def on_data_received(self, points):
         """استقبال البيانات وتحديث الرسم"""
         try:
-            self.all_points.extend(points)
+            self._store_points(points)
             self.plot.update_plot(points)
             self.scan_count += 1
+            
+            # Statistics follow the data instead of a timer, so an idle app stays idle
+            now = time.monotonic()
+            if now - self._last_stats > STATS_INTERVAL:
+                self._last_stats = now
+                self.update_statistics()
         except Exception as e:
             print(f"Error in on_data_received: {e}")
         
+    def _store_points(self, xy):
+        n = len(xy)
+        if self._n + n > len(self._points):
+            grown = np.empty((max(2 * len(self._points), self._n + n), 2), dtype=np.float32)
+            grown[:self._n] = self._points[:self._n]
+            self._points = grown
+        self._points[self._n:self._n + n] = xy
+        self._n += n
+        
     def on_error(self, error_msg):
         QMessageBox.critical(self, "Error", error_msg)
         self.disconnect_lidar()
@@ -421,7 +503,7 @@ class FixedLidarGUI(QMainWindow):
         self.stop_btn.setEnabled(True)
         self.start_time = time.time()
         self.scan_count = 0
-        self.all_points = []
+        self._n = 0
         self.plot.clear_points()
         
         self.update_statistics("Scanning started...")
@@ -432,13 +514,13 @@ class FixedLidarGUI(QMainWindow):
         
         if self.start_time:
             duration = time.time() - self.start_time
-            stats = f"Scan Completed!\n\nTotal Points: {len(self.all_points)}\nDuration: {duration:.1f}s\nScans Processed: {self.scan_count}\nPoints/Second: {len(self.all_points)/max(duration, 0.1):.0f}"
+            stats = f"Scan Completed!\n\nTotal Points: {self._n}\nDuration: {duration:.1f}s\nScans Processed: {self.scan_count}\nPoints/Second: {self._n/max(duration, 0.1):.0f}"
             self.update_statistics(stats)
             
     def update_visualization(self):
         """تحديث إعدادات التصور"""
         try:
-            if hasattr(self, 'plot') and self.plot.scatter is not None:
+            if hasattr(self, 'plot'):
                 self.plot.update_visualization_settings(
                     self.point_size.value(),
                     self.alpha_spin.value(),
@@ -453,10 +535,10 @@ class FixedLidarGUI(QMainWindow):
         elif self.start_time and self.connection_state:
             elapsed = time.time() - self.start_time
             stats = (f"Scanning...\n\n"
-                    f"Points: {len(self.all_points)}\n"
+                    f"Points: {self._n}\n"
                     f"Duration: {elapsed:.1f}s\n"
                     f"Scans: {self.scan_count}\n"
-                    f"Rate: {len(self.all_points)/max(elapsed, 0.1):.0f} pts/sec")
+                    f"Rate: {self._n/max(elapsed, 0.1):.0f} pts/sec")
             self.stats_text.setPlainText(stats)
             
     def clear_map(self):
@@ -464,12 +546,12 @@ class FixedLidarGUI(QMainWindow):
                                    "Clear all points from the map?",
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.all_points = []
+            self._n = 0
             self.plot.clear_points()
             self.update_statistics("Map cleared - Ready for new scan")
             
     def save_map(self):
-        if not self.all_points:
+        if self._n == 0:
             QMessageBox.warning(self, "Warning", "No data to save")
             return
             
@@ -483,10 +565,8 @@ class FixedLidarGUI(QMainWindow):
                     self.plot.fig.savefig(filename, dpi=300, bbox_inches='tight', 
                                         facecolor='#f8f9fa')
                 elif filename.endswith('.csv'):
-                    with open(filename, 'w', newline='') as file:
-                        writer = csv.writer(file)
-                        writer.writerow(['X', 'Y'])
-                        writer.writerows(self.all_points)
+                    np.savetxt(filename, self._points[:self._n], delimiter=',',
+                               fmt='%.3f', header='X,Y', comments='')
                 QMessageBox.information(self, "Success", f"Map saved successfully!")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Save failed: {str(e)}")
@@ -2,9 +2,95 @@ import pygame
 import sys
 import math
 import time
+import threading
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rplidar import RPLidar
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to the NumPy kernel
+    njit = None
+
+# The map keeps the newest point per CELL_SIZE grid cell (mm), so walls stay dense
+# and memory is bounded by the scanned area rather than by a point count
+CELL_SIZE = 50
+# Cell columns are packed into one int key; MAX_DISTANCE / CELL_SIZE is far below it
+CELL_KEY_STRIDE = 1 << 16
+# Starting capacity of the cell store and the published buffers
+INITIAL_CELLS = 4096
+
+# Accepted measurement range in mm: readings under MIN_DISTANCE are zero returns or
+# hits on the mount, and anything past the A1's rated 12 m is a glitch that would
+# stretch the room bounds
+MIN_DISTANCE = 100
+MAX_DISTANCE = 12000
+
+# Serial timeout per port while probing; a real RPLidar answers get_info in milliseconds
+PROBE_TIMEOUT = 0.5
+
+# Longest the display loop waits for a redraw signal before polling input again
+FRAME_INTERVAL = 1 / 30
+
+# Cos/sin lookup table on a 0.1 degree grid; worst-case rounding error is 0.05 degrees
+# (about 7 mm at 8 m), well under the sensor's own angular resolution
+LUT_STEPS_PER_DEGREE = 10
+_LUT_ANGLES = np.deg2rad(np.arange(360 * LUT_STEPS_PER_DEGREE) / LUT_STEPS_PER_DEGREE)
+_COS = np.cos(_LUT_ANGLES).astype(np.float32)
+_SIN = np.sin(_LUT_ANGLES).astype(np.float32)
+
+
+def _ingest(scan, out):
+    """Write [x, y] rows for the valid [quality, angle, distance] rows into out; return the row count"""
+    mask = (scan[:, 2] > MIN_DISTANCE) & (scan[:, 2] < MAX_DISTANCE)
+    idx = np.rint(scan[mask, 1] * LUT_STEPS_PER_DEGREE).astype(np.intp) % _COS.size
+    d = scan[mask, 2]
+    n = d.size
+    np.multiply(d, np.take(_COS, idx), out=out[:n, 0])
+    np.multiply(d, np.take(_SIN, idx), out=out[:n, 1])
+    return n
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _ingest(scan, out):
+        # Fused filter + table lookup in one pass, no temporaries
+        n = 0
+        for i in range(scan.shape[0]):
+            d = scan[i, 2]
+            if MIN_DISTANCE < d < MAX_DISTANCE:
+                k = int(scan[i, 1] * LUT_STEPS_PER_DEGREE + 0.5) % _COS.size
+                out[n, 0] = d * _COS[k]
+                out[n, 1] = d * _SIN[k]
+                n += 1
+        return n
+
+
+def _to_screen(pts, scale, cx, cy, size, out):
+    """Write the packed pixel index y*size + x of every on-screen point into out; return the count"""
+    screen_x = (pts[:, 0] * scale).astype(np.int32) + cx
+    screen_y = (pts[:, 1] * scale).astype(np.int32) + cy
+    visible = (screen_x >= 0) & (screen_x < size) & (screen_y >= 0) & (screen_y < size)
+    n = int(np.count_nonzero(visible))
+    np.add(screen_y[visible] * size, screen_x[visible], out=out[:n])
+    return n
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _to_screen(pts, scale, cx, cy, size, out):
+        # Fused scale + offset + bounds test, no temporaries
+        n = 0
+        for i in range(pts.shape[0]):
+            x = np.int32(pts[i, 0] * scale) + cx
+            y = np.int32(pts[i, 1] * scale) + cy
+            if 0 <= x < size and 0 <= y < size:
+                out[n] = y * size + x
+                n += 1
+        return n
+
+
 class RoomMapperLidar:
     def __init__(self, port='COM3', baudrate=115200):
         self.port = port
@@ -29,15 +115,31 @@ class RoomMapperLidar:
         self.ray_color = (80, 80, 120)
         self.measure_color = (255, 255, 0)  # Yellow for measurements
         
-        # Data storage
-        self.all_points = []
+        # Data storage: one [x, y] row in mm per occupied grid cell
+        self._cells = np.empty((INITIAL_CELLS, 2), dtype=np.float32)
+        self._cell_index = {}  # packed cell key -> row in _cells
+        self._count = 0
+        self._clear_map = False  # Reset request, honoured by the worker
         self.scan_count = 0
+        # Worker-side [x, y] scratch for one scan, grown if a scan ever outgrows it
+        self._xy_buf = np.empty((1024, 2), dtype=np.float32)
+        
+        # The worker owns the map; after each scan it copies it into the back buffer
+        # and swaps. Readers use _front only while holding _swap_lock.
+        self._front = np.empty((INITIAL_CELLS, 2), dtype=np.float32)
+        self._back = np.empty_like(self._front)
+        self._count_front = 0
+        self._swap_lock = threading.Lock()
+        # Set when a new scan is published or input changed the view
+        self._redraw = threading.Event()
         self.start_time = time.time()
         self.font = None
+        self._text_cache = {}  # text slot -> (text, rendered surface)
         
         # Room measurement
         self.show_measurements = True
         self.room_data = None
+        self._measured_scan = None  # scan_count the cached room_data belongs to
         
     def connect(self):
         """Connect to RPLidar"""
@@ -67,6 +169,21 @@ class RoomMapperLidar:
             pygame.display.set_caption("RPLidar Room Mapper - ESC: Exit | M: Measurements | +/-: Zoom")
             self.font = pygame.font.SysFont('Arial', 16, bold=True)
             self.large_font = pygame.font.SysFont('Arial', 20, bold=True)
+            
+            # One pre-rendered point, stamped at every point position
+            r = self.point_size
+            self.dot = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+            pygame.draw.circle(self.dot, self.point_color, (r, r), r)
+            
+            # Retained point layer, re-rendered only when the points or the zoom change
+            self.points_layer = pygame.Surface((self.screen_size, self.screen_size)).convert()
+            self.points_layer.set_colorkey((0, 0, 0))
+            self._layer_key = None
+            self._pixel_idx = np.empty(INITIAL_CELLS, dtype=np.int32)  # scratch for _to_screen
+            
+            # Circles and axes only change with the zoom
+            self.bg_surface = None
+            self._bg_scale = None
             print("✅ Pygame initialized successfully!")
             return True
         except Exception as e:
@@ -80,18 +197,20 @@ class RoomMapperLidar:
             self.is_scanning = True
             
             # Start scanning in separate thread
-            import threading
             scan_thread = threading.Thread(target=self.scan_worker, daemon=True)
             scan_thread.start()
             
-            # Main display loop
-            clock = pygame.time.Clock()
+            # Main display loop: redraw only on a new scan or view change, and at
+            # least once a second to keep the clock moving
+            last_draw = 0.0
             while self.is_scanning:
-                self.room_data = self.measure_room()  # Update measurements
-                self.draw_frame()
                 if self.handle_events():
                     break
-                clock.tick(30)
+                if self._redraw.wait(FRAME_INTERVAL) or time.time() - last_draw >= 1.0:
+                    self._redraw.clear()
+                    self.room_data = self.measure_room()  # Update measurements
+                    self.draw_frame()
+                    last_draw = time.time()
                 
         except Exception as e:
             print(f"❌ Scan error: {e}")
@@ -107,25 +226,29 @@ class RoomMapperLidar:
             for scan in self.lidar.iter_scans():
                 if not self.is_scanning:
                     break
+                if not scan:
+                    continue
+                if self._clear_map:
+                    self._cell_index.clear()
+                    self._count = 0
+                    self._clear_map = False
                 
-                new_points = []
-                valid_points = 0
-                
-                for quality, angle, distance in scan:
-                    if distance > 0:
-                        angle_rad = np.radians(angle)
-                        x = distance * np.cos(angle_rad)
-                        y = distance * np.sin(angle_rad)
-                        new_points.append((x, y))
-                        valid_points += 1
+                # Convert the whole scan at once: columns are quality, angle, distance.
+                # fromiter fills the float32 array straight from the tuples, with no
+                # float64 temporary in between
+                arr = np.fromiter(chain.from_iterable(scan), dtype=np.float32,
+                                  count=3 * len(scan)).reshape(-1, 3)
+                if len(scan) > len(self._xy_buf):
+                    self._xy_buf = np.empty((max(len(scan), 2 * len(self._xy_buf)), 2),
+                                            dtype=np.float32)
+                valid_points = _ingest(arr, self._xy_buf)
                 
-                if new_points:
-                    self.all_points.extend(new_points)
-                    # Keep only last 3000 points for performance
-                    if len(self.all_points) > 3000:
-                        self.all_points = self.all_points[-3000:]
+                if valid_points:
+                    self._add_to_map(self._xy_buf[:valid_points])
+                    self._publish()
                     
                     self.scan_count += 1
+                    self._redraw.set()
                     scan_num += 1
                     
                     if scan_num % 20 == 0:
@@ -135,31 +258,68 @@ class RoomMapperLidar:
             print(f"❌ Scan worker error: {e}")
             self.is_scanning = False
     
+    def _add_to_map(self, xy):
+        """Store xy rows in the grid map, replacing whatever point held each cell"""
+        cells = np.floor_divide(xy, CELL_SIZE).astype(np.int64)
+        keys = (cells[:, 0] * CELL_KEY_STRIDE + cells[:, 1]).tolist()
+        index = self._cell_index
+        rows = [index.setdefault(k, len(index)) for k in keys]
+        
+        if len(index) > len(self._cells):
+            grown = np.empty((max(len(index), 2 * len(self._cells)), 2), dtype=np.float32)
+            grown[:self._count] = self._cells[:self._count]
+            self._cells = grown
+        self._cells[rows] = xy
+        self._count = len(index)
+    
+    def _publish(self):
+        """Copy the map into the back buffer and swap it to the front"""
+        n = self._count
+        if len(self._back) < n:
+            self._back = np.empty_like(self._cells)
+        back = self._back
+        back[:n] = self._cells[:n]
+        with self._swap_lock:
+            self._front, self._back = back, self._front
+            self._count_front = n
+    
+    def points_view(self):
+        """Published map points, one per cell; only valid while holding _swap_lock"""
+        return self._front[:self._count_front]
+    
     def measure_room(self):
         """Calculate room dimensions and additional metrics"""
-        if len(self.all_points) > 100:
-            xs = [p[0] for p in self.all_points]
-            ys = [p[1] for p in self.all_points]
-            
-            width = max(xs) - min(xs)
-            height = max(ys) - min(ys)
-            
-            # Additional metrics
-            room_area = width * height / 1000000  # Convert to m²
-            perimeter = 2 * (width + height)
-            center_x = (max(xs) + min(xs)) / 2
-            center_y = (max(ys) + min(ys)) / 2
-            
-            return {
-                'width': width,
-                'height': height, 
-                'area': room_area,
-                'perimeter': perimeter,
-                'center': (center_x, center_y),
-                'bounds': (min(xs), min(ys), max(xs), max(ys)),
-                'point_count': len(self.all_points)
-            }
-        return None
+        # Points only change when a scan lands, so reuse the last result until then
+        if self._measured_scan == self.scan_count:
+            return self.room_data
+        self._measured_scan = self.scan_count
+        
+        with self._swap_lock:
+            pts = self.points_view()
+            point_count = len(pts)
+            if point_count <= 100:
+                return None
+            min_x, min_y = pts.min(axis=0).tolist()
+            max_x, max_y = pts.max(axis=0).tolist()
+        
+        width = max_x - min_x
+        height = max_y - min_y
+        
+        # Additional metrics
+        room_area = width * height / 1000000  # Convert to m²
+        perimeter = 2 * (width + height)
+        center_x = (max_x + min_x) / 2
+        center_y = (max_y + min_y) / 2
+        
+        return {
+            'width': width,
+            'height': height, 
+            'area': room_area,
+            'perimeter': perimeter,
+            'center': (center_x, center_y),
+            'bounds': (min_x, min_y, max_x, max_y),
+            'point_count': point_count
+        }
     
     def draw_room_measurements(self):
         """Draw room measurements on the screen"""
@@ -200,35 +360,36 @@ class RoomMapperLidar:
         pygame.draw.rect(self.screen, self.measure_color, measure_bg, 2)
         
         # Draw measurement text
+        seq = []
         for i, text in enumerate(measurements):
             color = self.measure_color if i == 0 else self.text_color
             font = self.large_font if i == 0 else self.font
-            text_surface = font.render(text, True, color)
-            self.screen.blit(text_surface, (self.screen_size - 210, 90 + i * 25))
+            seq.append((self._text(('measure', i), text, font, color),
+                        (self.screen_size - 210, 90 + i * 25)))
+        self.screen.blits(seq, doreturn=False)
+    
+    def _text(self, slot, text, font, color):
+        """Rendered text for a fixed screen slot, re-rendered only when the text changes"""
+        cached = self._text_cache.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, font.render(text, True, color))
+            self._text_cache[slot] = cached
+        return cached[1]
     
     def draw_frame(self):
         """Draw one frame with all points"""
-        # Clear screen
-        self.screen.fill(self.bg_color)
-        
-        # Draw distance circles
-        self.draw_distance_circles()
-        
-        # Draw axes
-        pygame.draw.line(self.screen, self.axis_color, 
-                        (self.center_x, 0), (self.center_x, self.screen_size), 1)
-        pygame.draw.line(self.screen, self.axis_color, 
-                        (0, self.center_y), (self.screen_size, self.center_y), 1)
+        # Clear screen with the pre-drawn background (circles and axes)
+        if self._bg_scale != self.scale:
+            self._rebuild_background()
+            self._bg_scale = self.scale
+        self.screen.blit(self.bg_surface, (0, 0))
         
         # Draw all points
-        if self.all_points:
-            for x, y in self.all_points:
-                screen_x = int(x * self.scale) + self.center_x
-                screen_y = int(y * self.scale) + self.center_y
-                
-                if 0 <= screen_x < self.screen_size and 0 <= screen_y < self.screen_size:
-                    pygame.draw.circle(self.screen, self.point_color, 
-                                     (screen_x, screen_y), self.point_size)
+        layer_key = (self.scan_count, self.scale)
+        if layer_key != self._layer_key:
+            self._render_points_layer()
+            self._layer_key = layer_key
+        self.screen.blit(self.points_layer, (0, 0))
         
         # Draw robot (center)
         pygame.draw.circle(self.screen, self.robot_color, 
@@ -245,42 +406,82 @@ class RoomMapperLidar:
         # Update display
         pygame.display.flip()
     
-    def draw_distance_circles(self):
+    def _render_points_layer(self):
+        """Stamp every on-screen point onto the cached point layer"""
+        self.points_layer.fill((0, 0, 0))
+        with self._swap_lock:
+            if len(self._pixel_idx) < self._count_front:
+                self._pixel_idx = np.empty(len(self._front), dtype=np.int32)
+            n = _to_screen(self.points_view(), np.float32(self.scale), self.center_x,
+                           self.center_y, self.screen_size, self._pixel_idx)
+        
+        # Cull points that land on an already used pixel: with a stationary
+        # sensor most scans hit the same wall spots again
+        pixels = np.unique(self._pixel_idx[:n])
+        screen_y, screen_x = np.divmod(pixels, self.screen_size)
+        
+        # One batched blit call instead of a draw.circle per point
+        r = self.point_size
+        seq = [(self.dot, (x - r, y - r))
+               for x, y in zip(screen_x.tolist(), screen_y.tolist())]
+        if hasattr(self.points_layer, 'fblits'):  # pygame-ce
+            self.points_layer.fblits(seq)
+        else:
+            self.points_layer.blits(seq, doreturn=False)
+    
+    def _rebuild_background(self):
+        """Pre-draw the static background for the current scale"""
+        self.bg_surface = pygame.Surface((self.screen_size, self.screen_size)).convert()
+        self.bg_surface.fill(self.bg_color)
+        
+        # Draw distance circles
+        self.draw_distance_circles(self.bg_surface)
+        
+        # Draw axes
+        pygame.draw.line(self.bg_surface, self.axis_color, 
+                        (self.center_x, 0), (self.center_x, self.screen_size), 1)
+        pygame.draw.line(self.bg_surface, self.axis_color, 
+                        (0, self.center_y), (self.screen_size, self.center_y), 1)
+    
+    def draw_distance_circles(self, surface):
         """Draw distance reference circles"""
         distances = [1000, 2000, 3000, 4000, 5000]  # mm
         for dist in distances:
             radius = int(dist * self.scale)
-            pygame.draw.circle(self.screen, (50, 50, 80), 
+            pygame.draw.circle(surface, (50, 50, 80), 
                              (self.center_x, self.center_y), radius, 1)
             
             # Add distance labels
             if dist in [2000, 4000]:  # Label only some circles to avoid clutter
                 text = self.font.render(f"{dist/1000:.1f}m", True, (100, 100, 150))
                 text_rect = text.get_rect(center=(self.center_x + radius + 20, self.center_y))
-                self.screen.blit(text, text_rect)
+                surface.blit(text, text_rect)
     
     def draw_stats(self):
         """Draw basic statistics on screen"""
         elapsed_time = time.time() - self.start_time
         
         stats = [
-            f"Time: {elapsed_time:.1f}s",
+            f"Time: {elapsed_time:.0f}s",  # Whole seconds, so it re-renders once a second
             f"Zoom: {self.scale:.2f}",
             f"Measurements: {'ON' if self.show_measurements else 'OFF'}",
             "ESC: Exit  M: Measurements",
             "+/-: Zoom  R: Reset"
         ]
         
-        for i, text in enumerate(stats):
-            text_surface = self.font.render(text, True, self.text_color)
-            self.screen.blit(text_surface, (10, 10 + i * 22))
+        seq = [(self._text(('stats', i), text, self.font, self.text_color), (10, 10 + i * 22))
+               for i, text in enumerate(stats)]
+        self.screen.blits(seq, doreturn=False)
     
     def handle_events(self):
         """Handle Pygame events"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return True
+            elif event.type == pygame.VIDEOEXPOSE:
+                self._redraw.set()
             elif event.type == pygame.KEYDOWN:
+                self._redraw.set()
                 if event.key == pygame.K_ESCAPE:
                     return True
                 elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
@@ -290,10 +491,14 @@ class RoomMapperLidar:
                     self.scale = max(self.scale * 0.8, 0.1)
                     print(f"🔍 Zoom: {self.scale:.2f}")
                 elif event.key == pygame.K_r:
-                    self.all_points = []
+                    self._clear_map = True
+                    with self._swap_lock:
+                        self._count_front = 0
                     self.scan_count = 0
                     self.start_time = time.time()
                     self.room_data = None
+                    self._measured_scan = None
+                    self._layer_key = None
                     print("🔄 View reset")
                 elif event.key == pygame.K_m:
                     self.show_measurements = not self.show_measurements
@@ -302,6 +507,7 @@ class RoomMapperLidar:
                 elif event.key == pygame.K_s:
                     self.save_scan_data()
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                self._redraw.set()
                 if event.button == 4:  # Mouse wheel up
                     self.scale = min(self.scale * 1.1, 2.0)
                 elif event.button == 5:  # Mouse wheel down
@@ -312,6 +518,9 @@ class RoomMapperLidar:
     def save_scan_data(self):
         """Save current scan data to file"""
         try:
+            with self._swap_lock:
+                points = self.points_view().copy()
+            
             filename = f"room_scan_{time.strftime('%Y%m%d_%H%M%S')}.txt"
             with open(filename, 'w') as f:
                 f.write(f"Room Scan Data - {time.ctime()}\n")
@@ -326,8 +535,7 @@ class RoomMapperLidar:
                     f.write(f"Total Scans: {self.scan_count}\n\n")
                 
                 f.write("Point Data (x, y in mm):\n")
-                for point in self.all_points:
-                    f.write(f"{point[0]:.1f}, {point[1]:.1f}\n")
+                np.savetxt(f, points, fmt='%.1f', delimiter=', ')
             
             print(f"💾 Scan data saved to: {filename}")
             return True
@@ -354,21 +562,36 @@ class RoomMapperLidar:
         pygame.quit()
         print("🔌 Disconnected successfully")
 
+def _probe_port(port):
+    """Return the model if an RPLidar answers on port, else None"""
+    try:
+        lidar = RPLidar(port, timeout=PROBE_TIMEOUT)
+        try:
+            return lidar.get_info()['model']
+        finally:
+            lidar.disconnect()
+    except Exception:
+        return None
+
 def test_com_ports():
     """Test different COM ports to find RPLidar"""
     ports = ['COM3', 'COM4', 'COM5', 'COM6', 'COM7']
+    print(f"🔍 Testing {', '.join(ports)}...")
     
-    for port in ports:
-        try:
-            print(f"🔍 Testing {port}...")
-            lidar = RPLidar(port, timeout=2)
-            info = lidar.get_info()
-            print(f"✅ Found RPLidar on {port}: {info['model']}")
-            lidar.disconnect()
-            return port
-        except:
+    # Probe every port at once and take the first one that answers
+    executor = ThreadPoolExecutor(max_workers=len(ports))
+    futures = {executor.submit(_probe_port, port): port for port in ports}
+    try:
+        for future in as_completed(futures):
+            port = futures[future]
+            model = future.result()
+            if model is not None:
+                print(f"✅ Found RPLidar on {port}: {model}")
+                return port
             print(f"❌ No device on {port}")
-            continue
+    finally:
+        # Don't wait on the remaining probes once a port has been found
+        executor.shutdown(wait=False)
     
     print("❌ No RPLidar found on any COM port!")
     return None